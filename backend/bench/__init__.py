@@ -0,0 +1 @@
+"""Benchmarks for the citation pipeline and backend HTTP layer."""
@@ -0,0 +1,363 @@
+"""
+Benchmark runner for the citation pipeline and the HTTP layer.
+
+Usage (from backend/):
+  python -m bench --rows 466347 --out bench/results/local.json
+  python -m bench --baseline bench/results/main.json --tolerance 0.15
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bench.synth import BACKEND_DIR, DEFAULT_HOTSPOTS, write_csv
+from citations import aggregate_csv, encode_geohash_batch
+from zones import ZoneStore
+
+RESULTS_DIR = BACKEND_DIR / "bench" / "results"
+
+# Bounding box the grid geocoder clamps to.
+MKE_BOUNDS = ((42.9, 43.2), (-88.1, -87.85))
+
+
+def time_repeats(fn: Callable[[], Any], repeats: int) -> Tuple[List[float], Any]:
+    timings: List[float] = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def summarize(timings: List[float], ops: int) -> Dict[str, Any]:
+    median = statistics.median(timings)
+    return {
+        "ops": ops,
+        "repeats": len(timings),
+        "min_s": min(timings),
+        "median_s": median,
+        "ops_per_s": ops / median if median else None,
+    }
+
+
+def random_points(count: int, seed: int) -> List[Tuple[float, float]]:
+    rng = random.Random(seed)
+    (lat_lo, lat_hi), (lng_lo, lng_hi) = MKE_BOUNDS
+    return [(rng.uniform(lat_lo, lat_hi), rng.uniform(lng_lo, lng_hi)) for _ in range(count)]
+
+
+def bench_ingest(csv_path: Path, rows: int, repeats: int) -> Tuple[Dict[str, Any], Any]:
+    timings, (zones, stats) = time_repeats(lambda: aggregate_csv(csv_path), repeats)
+    result = summarize(timings, rows)
+    result["zones"] = len(zones)
+    result["skipped"] = stats.skipped
+    return result, zones
+
+
+def bench_geohash(points: List[Tuple[float, float]], repeats: int) -> Dict[str, Any]:
+    timings, _ = time_repeats(lambda: encode_geohash_batch(points, 6), repeats)
+    return summarize(timings, len(points))
+
+
+def bench_risk_lookup(store: ZoneStore, points: List[Tuple[float, float]], repeats: int) -> Dict[str, Any]:
+    def run() -> int:
+        return sum(1 for lat, lng in points if store.risk_at(lat, lng) is not None)
+
+    timings, hits = time_repeats(run, repeats)
+    result = summarize(timings, len(points))
+    result["hits"] = hits
+    return result
+
+
+def bench_radius(
+    store: ZoneStore, points: List[Tuple[float, float]], radius_m: float, repeats: int
+) -> Dict[str, Any]:
+    def run() -> int:
+        return sum(len(store.nearby(lat, lng, radius_m)) for lat, lng in points)
+
+    timings, matched = time_repeats(run, repeats)
+    result = summarize(timings, len(points))
+    result["radius_m"] = radius_m
+    result["zones_matched"] = matched
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, path: str, timeout_s: float) -> bool:
+    """Poll `path` until it answers 2xx or the timeout expires."""
+    parsed = urllib.parse.urlsplit(url)
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=1)
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            resp.read()
+            conn.close()
+            if 200 <= resp.status < 300:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def start_server(
+    csv_path: Path, artifact_path: Path
+) -> Tuple[Optional[subprocess.Popen], Optional[str], Dict[str, Any]]:
+    """Launch `uvicorn main:app` on a free port; returns (process, base_url, startup timings).
+
+    The server builds its zone artifact from `csv_path` into `artifact_path`
+    (which should not exist yet), so time-to-ready covers the same work on
+    every machine and never touches the real backend/data artifact.
+    """
+    port = _free_port()
+    env = dict(os.environ)
+    env["CITYSMART_CITATIONS_CSV"] = str(csv_path)
+    env["CITYSMART_ZONES_PATH"] = str(artifact_path)
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    if not _wait_for(base_url, "/health", 15.0):
+        proc.terminate()
+        proc.wait()
+        return None, None, {}
+    startup: Dict[str, Any] = {"time_to_first_byte_s": time.perf_counter() - started}
+    if _wait_for(base_url, "/ready", 120.0):
+        startup["time_to_ready_s"] = time.perf_counter() - started
+    else:
+        startup["time_to_ready_s"] = None
+    return proc, base_url, startup
+
+
+def zone_paths(store: ZoneStore, points: List[Tuple[float, float]], radius_m: float, count: int = 64) -> List[str]:
+    """Nearby and per-zone requests against the store the server was built from."""
+    geohashes = [doc["geohash"] for doc in store.busiest(count)]
+    paths = [f"/zones/{geohash}" for geohash in geohashes]
+    paths += [f"/zones/nearby?lat={lat:.6f}&lng={lng:.6f}&radius_m={radius_m:g}" for lat, lng in points[:count]]
+    return paths
+
+
+def bench_http(base_url: str, paths: List[str], requests: int, concurrency: int) -> Dict[str, Any]:
+    parsed = urllib.parse.urlsplit(base_url)
+    per_worker = max(1, requests // concurrency)
+
+    def worker(index: int) -> Tuple[List[float], int]:
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=10)
+        latencies: List[float] = []
+        errors = 0
+        for i in range(per_worker):
+            path = paths[(index + i) % len(paths)]
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 400:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=10)
+            latencies.append(time.perf_counter() - start)
+        conn.close()
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(lat for lats, _ in results for lat in lats)
+    errors = sum(err for _, err in results)
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    return {
+        "ops": len(latencies),
+        "concurrency": concurrency,
+        "paths": paths,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "ops_per_s": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": pct(0.50) * 1000,
+        "p95_ms": pct(0.95) * 1000,
+        "p99_ms": pct(0.99) * 1000,
+        "median_s": pct(0.50),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return benchmarks whose best time regressed beyond `tolerance`."""
+    regressions: List[str] = []
+    for name, current in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        key = "min_s" if "min_s" in current else "median_s"
+        if not previous or key not in current or key not in previous:
+            continue
+        if previous["ops"] != current["ops"] or not previous[key]:
+            continue
+        ratio = current[key] / previous[key]
+        current["vs_baseline"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {ratio:.2f}x slower than baseline")
+    return regressions
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="CitySmart backend benchmarks.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic citations to ingest")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--lookups", type=int, default=100_000, help="Points for geohash/risk benchmarks")
+    parser.add_argument("--radius-queries", type=int, default=2_000)
+    parser.add_argument("--radius-m", type=float, default=800.0)
+    parser.add_argument("--hotspots", type=Path, default=DEFAULT_HOTSPOTS)
+    parser.add_argument("--csv", type=Path, help="Reuse an existing citation CSV instead of generating one")
+    parser.add_argument("--http-url", help="Benchmark a running server instead of starting uvicorn")
+    parser.add_argument(
+        "--http-path",
+        action="append",
+        default=[],
+        help="Path(s) to request (default: /zones lookups on the generated data, or /health with --http-url)",
+    )
+    parser.add_argument("--http-requests", type=int, default=5_000)
+    parser.add_argument("--http-concurrency", type=int, default=32)
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--out", type=Path, help="Results JSON (default bench/results/<rev>.json)")
+    parser.add_argument("--baseline", type=Path, help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown vs baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    rev = _git_rev()
+    results: Dict[str, Any] = {
+        "meta": {
+            "git_rev": rev,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "rows": args.rows,
+            "seed": args.seed,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "benchmarks": {},
+    }
+    benchmarks = results["benchmarks"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.csv
+        if csv_path is None:
+            csv_path = Path(tmp) / "citations.csv"
+            print(f"Generating {args.rows} synthetic citations...")
+            start = time.perf_counter()
+            write_csv(csv_path, args.rows, seed=args.seed, hotspots_path=args.hotspots)
+            benchmarks["synth"] = summarize([time.perf_counter() - start], args.rows)
+        with csv_path.open("rb") as fh:
+            rows = sum(1 for _ in fh) - 1
+
+        print("Benchmarking ingestion...")
+        benchmarks["ingest"], zones = bench_ingest(csv_path, rows, args.repeats)
+
+        store = ZoneStore.from_aggregates(zones)
+        points = random_points(args.lookups, args.seed)
+
+        print("Benchmarking geohash batch encode...")
+        benchmarks["geohash_batch"] = bench_geohash(points, args.repeats)
+        print("Benchmarking risk lookups...")
+        benchmarks["risk_lookup"] = bench_risk_lookup(store, points, args.repeats)
+        print("Benchmarking radius queries...")
+        benchmarks["radius_query"] = bench_radius(
+            store, points[: args.radius_queries], args.radius_m, args.repeats
+        )
+
+        if not args.skip_http:
+            proc = None
+            base_url = args.http_url
+            if base_url is None:
+                # The CSV lives in `tmp`, so the server must be done before it is removed.
+                proc, base_url, startup = start_server(csv_path, Path(tmp) / "zones.json")
+                if startup:
+                    benchmarks["startup"] = startup
+            if base_url is None:
+                print("Skipping HTTP benchmark: could not start uvicorn main:app", file=sys.stderr)
+                benchmarks["http"] = {"skipped": "server unavailable"}
+            else:
+                paths = args.http_path
+                if not paths:
+                    # Only a server we started is known to serve the generated zones.
+                    paths = ["/health"] if proc is None else zone_paths(store, points, args.radius_m)
+                try:
+                    print(f"Benchmarking HTTP at {base_url}...")
+                    benchmarks["http"] = bench_http(
+                        base_url,
+                        paths,
+                        args.http_requests,
+                        args.http_concurrency,
+                    )
+                finally:
+                    if proc is not None:
+                        proc.terminate()
+                        proc.wait()
+
+    status = 0
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        results["regressions"] = regressions
+        for line in regressions:
+            print(f"❌ {line}", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    out = args.out or RESULTS_DIR / f"{rev or 'local'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    for name, result in benchmarks.items():
+        if "ops_per_s" in result and result["ops_per_s"]:
+            print(f"  {name:<14} {result['ops_per_s']:>14,.0f} ops/s")
+    print(f"Results written to {out}")
+    return status
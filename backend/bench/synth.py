@@ -0,0 +1,230 @@
+"""
+Synthetic Milwaukee citation generator.
+
+Rows follow the byDayAndHour, topViolations and topStreets distributions in
+citation_hotspots.json and use grid-style addresses the geocoder understands.
+Output is deterministic for a given seed.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_HOTSPOTS = BACKEND_DIR / "citation_hotspots.json"
+
+CSV_HEADER = "ISSUENO,ISSUEDATE,ISSUETIME,VIODESCRIPTION,LOCATIONDESC1"
+
+# Address forms for the hotspot street keys: (direction choices, full name).
+STREET_FORMS: Dict[str, Tuple[str, str]] = {
+    "FARWELL": ("N", "FARWELL AV"),
+    "WELLS": ("EW", "WELLS ST"),
+    "WISCONSIN": ("EW", "WISCONSIN AV"),
+    "KILBOURN": ("EW", "KILBOURN AV"),
+    "BROADWAY": ("NS", "BROADWAY"),
+    "VEL": ("N", "VEL R PHILLIPS AV"),
+    "WATER": ("NS", "WATER ST"),
+    "PROSPECT": ("N", "PROSPECT AV"),
+    "DR": ("N", "DR MARTIN L KING JR DR"),
+    "CRAMER": ("N", "CRAMER ST"),
+}
+
+# Named long-tail streets; numbered streets up to 124TH are added as well.
+TAIL_NAMED_STREETS = [
+    "STATE ST",
+    "JUNEAU AV",
+    "NORTH AV",
+    "CENTER ST",
+    "BURLEIGH ST",
+    "LOCUST ST",
+    "OKLAHOMA AV",
+    "LINCOLN AV",
+    "GREENFIELD AV",
+    "BRADY ST",
+    "MCKINLEY AV",
+    "CAPITOL DR",
+    "RESERVOIR AV",
+    "KEEFE AV",
+    "SILVER SPRING DR",
+    "FOREST HOME AV",
+    "NATIONAL AV",
+    "MITCHELL ST",
+    "HOLT AV",
+    "LAYTON AV",
+]
+MAX_NUMBERED_STREET = 124
+
+# Tail entries stay below this fraction of the smallest real top-N count.
+TAIL_CAP_RATIO = 0.9
+
+TAIL_VIOLATIONS = [
+    "PARKED WITHIN 10 FEET OF FIRE HYDRANT",
+    "LOADING ZONE",
+    "RESIDENTIAL PERMIT PARKING ONLY",
+    "TOW AWAY ZONE",
+    "BUS STOP",
+    "PARKED IN ALLEY",
+    "DOUBLE PARKING",
+    "PARKED ON SIDEWALK",
+    "PARKED IN DISABLED ZONE",
+    "ABANDONED VEHICLE",
+]
+
+
+def load_hotspots(path: Path = DEFAULT_HOTSPOTS) -> Dict[str, object]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+class CitationSynth:
+    """Samples citation rows from the aggregate hotspot distributions."""
+
+    def __init__(self, hotspots: Dict[str, object], seed: int = 0, year: int = 2025) -> None:
+        self._rng = random.Random(seed)
+        total = int(hotspots["totalCitations"])
+
+        day_hour = hotspots["byDayAndHour"]
+        self._slots: List[Tuple[int, int]] = []
+        slot_weights: List[int] = []
+        for key, count in day_hour.items():
+            day, hour = key.split("-")
+            self._slots.append((int(day), int(hour)))
+            slot_weights.append(int(count))
+        self._slot_cum = _cumulative(slot_weights)
+
+        violations = {name: int(n) for name, n in hotspots["topViolations"].items()}
+        tail = max(0, total - sum(violations.values()))
+        tail_names = [name for name in TAIL_VIOLATIONS if name not in violations]
+        cap = TAIL_CAP_RATIO * min(violations.values(), default=tail)
+        for name, weight in zip(tail_names, tail_weights(tail, len(tail_names), cap)):
+            violations[name] = weight
+        self._violations = list(violations)
+        self._violation_cum = _cumulative(list(violations.values()))
+
+        streets: List[Tuple[str, str]] = []
+        street_weights: List[int] = []
+        for key, count in hotspots["topStreets"].items():
+            streets.append(_street_form(key))
+            street_weights.append(int(count))
+        tail = max(0, total - sum(street_weights))
+        tail_streets = _tail_streets(set(hotspots["topStreets"]))
+        cap = TAIL_CAP_RATIO * min(street_weights, default=tail)
+        for form, weight in zip(tail_streets, tail_weights(tail, len(tail_streets), cap)):
+            streets.append(form)
+            street_weights.append(weight)
+        self._streets = streets
+        self._street_cum = _cumulative(street_weights)
+
+        self._dates_by_day: List[List[str]] = [[] for _ in range(7)]
+        day = dt.date(year, 1, 1)
+        while day.year == year:
+            self._dates_by_day[(day.weekday() + 1) % 7].append(
+                f"{day.month}/{day.day}/{day.year}"
+            )
+            day += dt.timedelta(days=1)
+
+    def address(self) -> str:
+        rng = self._rng
+        directions, street = rng.choices(self._streets, cum_weights=self._street_cum)[0]
+        direction = rng.choice(directions)
+        house = rng.randrange(100, 4000 if direction in "NS" else 3000)
+        return f"{house} {direction} {street}"
+
+    def row(self, issue_no: int) -> str:
+        rng = self._rng
+        day, hour = rng.choices(self._slots, cum_weights=self._slot_cum)[0]
+        date = rng.choice(self._dates_by_day[day])
+        hour12 = hour % 12 or 12
+        ampm = "AM" if hour < 12 else "PM"
+        time = f"{hour12}:{rng.randrange(60):02d}:{rng.randrange(60):02d} {ampm}"
+        violation = rng.choices(self._violations, cum_weights=self._violation_cum)[0]
+        return f"{issue_no},{date},{time},{violation},{self.address()}"
+
+    def rows(self, count: int, start: int = 500_000_000) -> Iterator[str]:
+        for i in range(count):
+            yield self.row(start + i)
+
+
+def _cumulative(weights: List[int]) -> List[int]:
+    out: List[int] = []
+    running = 0
+    for w in weights:
+        running += w
+        out.append(running)
+    return out
+
+
+def tail_weights(mass: int, count: int, cap: float) -> List[int]:
+    """Linearly decaying weights from `cap` that sum to about `mass`.
+
+    If `count` entries under the cap can't hold all of `mass`, the remainder is
+    dropped rather than letting tail entries outrank the real top-N.
+    """
+    if count <= 0 or mass <= 0:
+        return []
+    if count == 1:
+        return [int(min(cap, mass))]
+    floor = min(cap, max(1.0, 2 * mass / count - cap))
+    step = (cap - floor) / (count - 1)
+    return [max(1, int(cap - i * step)) for i in range(count)]
+
+
+def _ordinal(n: int) -> str:
+    if 10 <= n % 100 <= 20:
+        suffix = "TH"
+    else:
+        suffix = {1: "ST", 2: "ND", 3: "RD"}.get(n % 10, "TH")
+    return f"{n}{suffix}"
+
+
+def _tail_streets(top_keys: set[str]) -> List[Tuple[str, str]]:
+    """Named and numbered streets outside the hotspot list, interleaved."""
+    named = [("EW", name) for name in TAIL_NAMED_STREETS if name.split()[0] not in top_keys]
+    numbered = [
+        ("NS", f"{_ordinal(n)} ST")
+        for n in range(1, MAX_NUMBERED_STREET + 1)
+        if _ordinal(n) not in top_keys
+    ]
+    streets: List[Tuple[str, str]] = []
+    for i in range(max(len(named), len(numbered))):
+        streets.extend(pool[i] for pool in (numbered, named) if i < len(pool))
+    return streets
+
+
+def _street_form(key: str) -> Tuple[str, str]:
+    if key in STREET_FORMS:
+        return STREET_FORMS[key]
+    if key[:1].isdigit():
+        return ("NS", f"{key} ST")
+    return ("EW", f"{key} ST")
+
+
+def write_csv(path: Path, count: int, seed: int = 0, hotspots_path: Path = DEFAULT_HOTSPOTS) -> Path:
+    synth = CitationSynth(load_hotspots(hotspots_path), seed=seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="latin-1", newline="") as fh:
+        fh.write(CSV_HEADER + "\n")
+        for line in synth.rows(count):
+            fh.write(line + "\n")
+    return path
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic citation CSV.")
+    parser.add_argument("--rows", type=int, default=466_347, help="Number of citations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hotspots", type=Path, default=DEFAULT_HOTSPOTS)
+    parser.add_argument("--out", type=Path, required=True, help="Output CSV path")
+    args = parser.parse_args(argv)
+
+    write_csv(args.out, args.rows, seed=args.seed, hotspots_path=args.hotspots)
+    print(f"Wrote {args.rows} citations to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,326 @@
+"""
+Citation parsing and aggregation, ported from process_citations.js.
+
+Reads the Milwaukee citation CSV (ISSUENO,ISSUEDATE,ISSUETIME,VIODESCRIPTION,
+LOCATIONDESC1), geocodes addresses with the city grid approximation and
+aggregates citations into geohash zones.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+ZONE_PRECISION = 5
+
+DAY_NAMES = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+# Baseline coordinates (Wisconsin Ave & Water St - downtown)
+BASELINE_LAT = 43.0389
+BASELINE_LNG = -87.9122
+
+# Milwaukee uses 800 addresses per mile
+LAT_PER_ADDRESS = 0.0145 / 800
+LNG_PER_ADDRESS = 0.0189 / 800
+
+KNOWN_STREETS = {
+    "WISCONSIN": 43.0389,
+    "WELLS": 43.0415,
+    "STATE": 43.0440,
+    "JUNEAU": 43.0470,
+    "MCKINLEY": 43.0500,
+    "CAPITOL": 43.0540,
+    "RESERVOIR": 43.0600,
+    "LOCUST": 43.0650,
+    "KEEFE": 43.0700,
+    "NORTH": 43.0530,
+    "CENTER": 43.0640,
+    "BURLEIGH": 43.0730,
+    "SILVER SPRING": 43.1200,
+    "OKLAHOMA": 42.9780,
+    "LINCOLN": 42.9700,
+    "FOREST HOME": 42.9850,
+    "GREENFIELD": 42.9620,
+}
+
+_ADDRESS_RE = re.compile(r"^(\d+)\s+([NSEW])?\s*(.+)$", re.IGNORECASE)
+_NUMBERED_STREET_RE = re.compile(r"^(\d+)(ST|ND|RD|TH)", re.IGNORECASE)
+_TIME_RE = re.compile(r"(\d+):(\d+):(\d+)\s*(AM|PM)?", re.IGNORECASE)
+
+
+def encode_geohash(lat: float, lon: float, precision: int = 6) -> str:
+    lat_min, lat_max = -90.0, 90.0
+    lon_min, lon_max = -180.0, 180.0
+    chars: List[str] = []
+    idx = 0
+    bit = 0
+    even_bit = True
+    while len(chars) < precision:
+        if even_bit:
+            mid = (lon_min + lon_max) / 2
+            if lon >= mid:
+                idx = idx * 2 + 1
+                lon_min = mid
+            else:
+                idx = idx * 2
+                lon_max = mid
+        else:
+            mid = (lat_min + lat_max) / 2
+            if lat >= mid:
+                idx = idx * 2 + 1
+                lat_min = mid
+            else:
+                idx = idx * 2
+                lat_max = mid
+        even_bit = not even_bit
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_BASE32[idx])
+            bit = 0
+            idx = 0
+    return "".join(chars)
+
+
+def encode_geohash_batch(
+    coords: Iterable[Tuple[float, float]], precision: int = 6
+) -> List[str]:
+    return [encode_geohash(lat, lng, precision) for lat, lng in coords]
+
+
+class GridGeocoder:
+    """Milwaukee address -> approximate coordinates using the street grid."""
+
+    def __init__(self) -> None:
+        self._cache: Dict[str, Optional[Tuple[float, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def geocode(self, address: str) -> Optional[Tuple[float, float]]:
+        if not address:
+            return None
+        key = address.strip().lower()
+        if key in self._cache:
+            return self._cache[key]
+        result = _geocode_uncached(address)
+        self._cache[key] = result
+        return result
+
+
+def _geocode_uncached(address: str) -> Optional[Tuple[float, float]]:
+    match = _ADDRESS_RE.match(address)
+    if not match:
+        return None
+
+    house_num = int(match.group(1))
+    direction = (match.group(2) or "").upper()
+    street_name = match.group(3).strip().upper()
+
+    lat = BASELINE_LAT
+    lng = BASELINE_LNG
+
+    street_num_match = _NUMBERED_STREET_RE.match(street_name)
+    if street_num_match:
+        # Numbered streets run north-south; the street number sets the
+        # east-west position and the house number the north-south one.
+        street_num = int(street_num_match.group(1))
+        if street_num <= 5:
+            lng = BASELINE_LNG + street_num * 0.0025
+        else:
+            lng = BASELINE_LNG - (street_num - 1) * 0.0019
+
+        if direction == "N":
+            lat = BASELINE_LAT + house_num * LAT_PER_ADDRESS
+        elif direction == "S":
+            lat = BASELINE_LAT - house_num * LAT_PER_ADDRESS
+        else:
+            sign = 1 if house_num % 2 == 0 else -1
+            lat = BASELINE_LAT + sign * house_num * LAT_PER_ADDRESS * 0.5
+    else:
+        # Named streets run east-west; spread unknown ones by a name hash.
+        street_hash = sum(ord(c) for c in street_name)
+        lat = BASELINE_LAT + ((street_hash % 200) - 100) * 0.0005
+        for name, known_lat in KNOWN_STREETS.items():
+            if name in street_name:
+                lat = known_lat
+                break
+
+        if direction == "E":
+            lng = BASELINE_LNG + house_num * LNG_PER_ADDRESS
+        elif direction == "W":
+            lng = BASELINE_LNG - house_num * LNG_PER_ADDRESS
+        else:
+            sign = 1 if house_num % 2 == 0 else -1
+            lng = BASELINE_LNG + sign * house_num * LNG_PER_ADDRESS * 0.5
+
+    # Clamp to Milwaukee metro bounds
+    lat = max(42.9, min(43.2, lat))
+    lng = max(-88.1, min(-87.85, lng))
+    return lat, lng
+
+
+def parse_hour(time_str: str) -> Optional[int]:
+    """Parse a time like "7:14:00 AM" into an hour (0-23)."""
+    if not time_str:
+        return None
+    match = _TIME_RE.search(time_str)
+    if not match:
+        return None
+    hour = int(match.group(1))
+    ampm = (match.group(4) or "").upper()
+    if ampm == "PM" and hour != 12:
+        hour += 12
+    if ampm == "AM" and hour == 12:
+        hour = 0
+    if not 0 <= hour <= 23:
+        return None
+    return hour
+
+
+def parse_day_of_week(date_str: str) -> Optional[int]:
+    """Parse M/D/YYYY into a day of week (0=Sunday, 6=Saturday)."""
+    if not date_str:
+        return None
+    try:
+        month, day, year = (int(p) for p in date_str.split("/"))
+        return (dt.date(year, month, day).weekday() + 1) % 7
+    except ValueError:
+        return None
+
+
+def violation_category(violation: str) -> str:
+    v = (violation or "").upper()
+    if "NIGHT PARKING" in v:
+        return "night_parking"
+    if "METER" in v:
+        return "meter"
+    if "HOUR" in v or "EXCESS" in v:
+        return "time_limit"
+    if "SIGN" in v or "PROHIBITED" in v:
+        return "no_parking"
+    if "REGISTRATION" in v or "UNREGISTERED" in v:
+        return "registration"
+    if "FIRE HYDRANT" in v:
+        return "fire_hydrant"
+    if "CROSSWALK" in v:
+        return "crosswalk"
+    if "TOW" in v or "BLOCKING" in v:
+        return "tow_zone"
+    if "RESIDENTIAL" in v:
+        return "residential_permit"
+    if "BUS" in v or "LOADING" in v:
+        return "loading_zone"
+    return "other"
+
+
+@dataclass
+class ZoneAggregate:
+    geohash: str
+    lat: float
+    lng: float
+    total_citations: int = 0
+    by_hour: List[int] = field(default_factory=lambda: [0] * 24)
+    by_day_of_week: List[int] = field(default_factory=lambda: [0] * 7)
+    by_category: Dict[str, int] = field(default_factory=dict)
+    by_hour_and_day: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class IngestStats:
+    lines: int = 0
+    processed: int = 0
+    skipped: int = 0
+
+
+def iter_rows(csv_path: Path) -> Iterator[List[str]]:
+    """Yield split rows after the header (addresses contain no commas)."""
+    with csv_path.open("r", encoding="latin-1") as fh:
+        next(fh, None)
+        for line in fh:
+            yield line.rstrip("\r\n").split(",")
+
+
+def aggregate_rows(
+    rows: Iterable[List[str]],
+    geocoder: GridGeocoder | None = None,
+    precision: int = ZONE_PRECISION,
+) -> Tuple[Dict[str, ZoneAggregate], IngestStats]:
+    geocoder = geocoder or GridGeocoder()
+    zones: Dict[str, ZoneAggregate] = {}
+    stats = IngestStats()
+
+    for parts in rows:
+        stats.lines += 1
+        if len(parts) < 5:
+            stats.skipped += 1
+            continue
+        _, issue_date, issue_time, violation, location = parts[:5]
+
+        coords = geocoder.geocode(location)
+        if coords is None:
+            stats.skipped += 1
+            continue
+        hour = parse_hour(issue_time)
+        day = parse_day_of_week(issue_date)
+        if hour is None or day is None:
+            stats.skipped += 1
+            continue
+
+        lat, lng = coords
+        geohash = encode_geohash(lat, lng, precision)
+        agg = zones.get(geohash)
+        if agg is None:
+            agg = zones[geohash] = ZoneAggregate(geohash=geohash, lat=lat, lng=lng)
+        agg.total_citations += 1
+        agg.by_hour[hour] += 1
+        agg.by_day_of_week[day] += 1
+        category = violation_category(violation)
+        agg.by_category[category] = agg.by_category.get(category, 0) + 1
+        key = f"{hour}_{day}"
+        agg.by_hour_and_day[key] = agg.by_hour_and_day.get(key, 0) + 1
+        stats.processed += 1
+
+    return zones, stats
+
+
+def aggregate_csv(
+    csv_path: Path, precision: int = ZONE_PRECISION
+) -> Tuple[Dict[str, ZoneAggregate], IngestStats]:
+    return aggregate_rows(iter_rows(csv_path), precision=precision)
+
+
+def risk_score(agg: ZoneAggregate, max_citations: int) -> int:
+    """Risk score (0-100): 60% density, 20% night share, 20% weekend share."""
+    if agg.total_citations == 0 or max_citations == 0:
+        return 0
+    density = min(100.0, agg.total_citations / max_citations * 100)
+    night = sum(agg.by_hour[:6]) / agg.total_citations * 100
+    weekend = (agg.by_day_of_week[0] + agg.by_day_of_week[6]) / agg.total_citations * 100
+    # JS Math.round rounds halves up.
+    return int(density * 0.6 + night * 0.2 + weekend * 0.2 + 0.5)
+
+
+def risk_level(score: int) -> str:
+    if score >= 70:
+        return "high"
+    if score >= 40:
+        return "medium"
+    return "low"
+
+
+def peak_hours(agg: ZoneAggregate, count: int = 3) -> List[int]:
+    ranked = sorted(range(24), key=lambda h: agg.by_hour[h], reverse=True)
+    return ranked[:count]
+
+
+def peak_days(agg: ZoneAggregate, count: int = 3) -> List[Dict[str, object]]:
+    ranked = sorted(range(7), key=lambda d: agg.by_day_of_week[d], reverse=True)
+    return [{"day": DAY_NAMES[d], "dayNum": d} for d in ranked[:count]]
+
+
+def top_categories(agg: ZoneAggregate, count: int = 3) -> List[Dict[str, object]]:
+    ranked = sorted(agg.by_category.items(), key=lambda kv: kv[1], reverse=True)
+    return [{"category": cat, "count": n} for cat, n in ranked[:count]]
@@ -0,0 +1,374 @@
+"""
+Bulk loader from citation aggregates into a zone sink.
+
+Python counterpart of uploadToFirestore/createSummaryStats in
+process_citations.js. Zones are written in fixed batches with a bounded number
+in flight; the citation_stats summary is accumulated while zones stream out and
+written last. Completed batches are recorded in a checkpoint so an interrupted
+run resumes where it stopped; the checkpoint is removed once the run finishes.
+
+Usage (from backend/):
+  python loader.py --csv citations_2025.csv --sink sqlite:///zones.db
+  python loader.py --csv citations_2025.csv --sink file:data/firestore
+  python loader.py --csv citations_2025.csv --sink emulator:localhost:8080
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+from citations import DAY_NAMES, ZoneAggregate, aggregate_csv
+from zones import zone_document
+
+ZONES_COLLECTION = "citation_risk_zones"
+STATS_COLLECTION = "app_config"
+STATS_DOC = "citation_stats"
+DEFAULT_PROJECT = "mkeparkapp-1ad15"
+
+# Firestore batches are limited to 500 operations.
+DEFAULT_BATCH_SIZE = 400
+
+Doc = Tuple[str, Dict[str, Any]]
+
+
+class Sink(Protocol):
+    def write_batch(self, collection: str, docs: List[Doc]) -> None:
+        """Upsert documents; must be safe to repeat for the same batch."""
+
+    def close(self) -> None:
+        ...
+
+
+class FileSink:
+    """One JSON file per document under root/<collection>/<id>.json."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def write_batch(self, collection: str, docs: List[Doc]) -> None:
+        folder = self.root / collection
+        folder.mkdir(parents=True, exist_ok=True)
+        for doc_id, doc in docs:
+            tmp = folder / f".{doc_id}.tmp"
+            tmp.write_text(json.dumps(doc), encoding="utf-8")
+            tmp.replace(folder / f"{doc_id}.json")
+
+    def close(self) -> None:
+        pass
+
+
+class SqlSink:
+    """Documents table in any SQLAlchemy database (collection, id, JSON data)."""
+
+    def __init__(self, url: str) -> None:
+        from sqlalchemy import Column, MetaData, String, Table, Text, create_engine
+
+        self._engine = create_engine(url)
+        metadata = MetaData()
+        self._table = Table(
+            "documents",
+            metadata,
+            Column("collection", String(64), primary_key=True),
+            Column("id", String(128), primary_key=True),
+            Column("data", Text, nullable=False),
+        )
+        metadata.create_all(self._engine)
+
+    def write_batch(self, collection: str, docs: List[Doc]) -> None:
+        table = self._table
+        ids = [doc_id for doc_id, _ in docs]
+        rows = [{"collection": collection, "id": doc_id, "data": json.dumps(doc)} for doc_id, doc in docs]
+        # Delete + insert in one transaction keeps the upsert portable across dialects.
+        with self._engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.collection == collection, table.c.id.in_(ids)))
+            conn.execute(table.insert(), rows)
+
+    def close(self) -> None:
+        self._engine.dispose()
+
+
+class EmulatorSink:
+    """Firestore emulator (or any REST-compatible stand-in) via documents:commit."""
+
+    def __init__(self, host: str, project: str) -> None:
+        self._database = f"projects/{project}/databases/(default)"
+        self._url = f"http://{host}/v1/{self._database}/documents:commit"
+
+    def write_batch(self, collection: str, docs: List[Doc]) -> None:
+        writes = [
+            {
+                "update": {
+                    "name": f"{self._database}/documents/{collection}/{doc_id}",
+                    "fields": {k: _firestore_value(v) for k, v in doc.items()},
+                }
+            }
+            for doc_id, doc in docs
+        ]
+        body = json.dumps({"writes": writes}).encode("utf-8")
+        req = urllib.request.Request(
+            self._url,
+            data=body,
+            headers={"Content-Type": "application/json", "Authorization": "Bearer owner"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=60) as resp:  # nosec B310
+            resp.read()
+
+    def close(self) -> None:
+        pass
+
+
+def _firestore_value(value: Any) -> Dict[str, Any]:
+    if value is None:
+        return {"nullValue": None}
+    if isinstance(value, bool):
+        return {"booleanValue": value}
+    if isinstance(value, int):
+        return {"integerValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    if isinstance(value, dict):
+        if set(value) == {"lat", "lng"}:
+            return {"geoPointValue": {"latitude": value["lat"], "longitude": value["lng"]}}
+        return {"mapValue": {"fields": {k: _firestore_value(v) for k, v in value.items()}}}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_firestore_value(v) for v in value]}}
+    raise TypeError(f"Unsupported Firestore value: {type(value).__name__}")
+
+
+def open_sink(spec: str, project: str = DEFAULT_PROJECT) -> Sink:
+    """`file:<dir>`, `emulator:<host:port>` or any SQLAlchemy URL."""
+    if spec.startswith("file:"):
+        return FileSink(Path(spec[len("file:"):]))
+    if spec.startswith("emulator:"):
+        return EmulatorSink(spec[len("emulator:"):], project)
+    return SqlSink(spec)
+
+
+class Checkpoint:
+    """Batches already committed for a given input, persisted after each batch."""
+
+    def __init__(self, path: Optional[Path], fingerprint: str) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+        self.done: set[int] = set()
+        self.summary_written = False
+        self._lock = threading.Lock()
+        if path is not None and path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                data = {}
+            if isinstance(data, dict) and data.get("fingerprint") == fingerprint:
+                self.done = set(data.get("done", []))
+                self.summary_written = bool(data.get("summary"))
+
+    def mark(self, batch: Optional[int] = None, summary: bool = False) -> None:
+        with self._lock:
+            if batch is not None:
+                self.done.add(batch)
+            if summary:
+                self.summary_written = True
+            if self.path is None:
+                return
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(
+                json.dumps(
+                    {
+                        "fingerprint": self.fingerprint,
+                        "done": sorted(self.done),
+                        "summary": self.summary_written,
+                    }
+                ),
+                encoding="utf-8",
+            )
+            tmp.replace(self.path)
+
+    def clear(self) -> None:
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+
+def fingerprint(zones: List[ZoneAggregate], batch_size: int, source: str = "") -> str:
+    """Identifies one load: the input (`source`, e.g. sink spec plus CSV stat) and its batching."""
+    digest = hashlib.sha256(f"{source}\n{batch_size}\n".encode())
+    for agg in zones:
+        digest.update(f"{agg.geohash}:{agg.total_citations};".encode())
+    return digest.hexdigest()
+
+
+class SummaryAccumulator:
+    def __init__(self) -> None:
+        self.total_citations = 0
+        self.total_zones = 0
+        self.by_hour = [0] * 24
+        self.by_day_of_week = [0] * 7
+        self.by_category: Dict[str, int] = {}
+
+    def add(self, agg: ZoneAggregate) -> None:
+        self.total_citations += agg.total_citations
+        self.total_zones += 1
+        for i, count in enumerate(agg.by_hour):
+            self.by_hour[i] += count
+        for i, count in enumerate(agg.by_day_of_week):
+            self.by_day_of_week[i] += count
+        for category, count in agg.by_category.items():
+            self.by_category[category] = self.by_category.get(category, 0) + count
+
+    def document(self, updated_at: str) -> Dict[str, Any]:
+        peak_hour = self.by_hour.index(max(self.by_hour))
+        peak_day = self.by_day_of_week.index(max(self.by_day_of_week))
+        return {
+            "totalCitations": self.total_citations,
+            "totalZones": self.total_zones,
+            "byHour": self.by_hour,
+            "byDayOfWeek": self.by_day_of_week,
+            "byCategory": self.by_category,
+            "peakHour": peak_hour,
+            "peakDay": DAY_NAMES[peak_day],
+            "lastUpdated": updated_at,
+            "dataSource": "Milwaukee 2025 Citations",
+        }
+
+
+def write_with_retry(sink: Sink, collection: str, docs: List[Doc], retries: int, backoff_s: float) -> None:
+    for attempt in range(retries + 1):
+        try:
+            sink.write_batch(collection, docs)
+            return
+        except Exception:  # pylint: disable=broad-except
+            if attempt == retries:
+                raise
+            time.sleep(backoff_s * (2**attempt))
+
+
+def load_zones(
+    zones: Dict[str, ZoneAggregate],
+    sink: Sink,
+    checkpoint_path: Optional[Path] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    in_flight: int = 4,
+    retries: int = 3,
+    backoff_s: float = 0.5,
+    source: str = "",
+) -> Dict[str, Any]:
+    """Write zone documents then the summary; returns the summary document.
+
+    `source` goes into the checkpoint fingerprint so a checkpoint left by a load
+    into another sink (or from another CSV) is not resumed.
+    """
+    ordered = [zones[key] for key in sorted(zones)]
+    checkpoint = Checkpoint(checkpoint_path, fingerprint(ordered, batch_size, source))
+    if checkpoint.done:
+        print(
+            f"Warning: resuming from {checkpoint_path}; skipping {len(checkpoint.done)} "
+            "batches already written",
+            file=sys.stderr,
+        )
+    max_citations = max((agg.total_citations for agg in ordered), default=0)
+    updated_at = dt.datetime.now(dt.timezone.utc).isoformat()
+    summary = SummaryAccumulator()
+
+    slots = threading.BoundedSemaphore(max(1, in_flight))
+    failures: List[BaseException] = []
+    pending: List[Future] = []
+
+    def submit(pool: ThreadPoolExecutor, index: int, docs: List[Doc]) -> None:
+        slots.acquire()
+        if failures:
+            slots.release()
+            return
+
+        def run() -> None:
+            try:
+                write_with_retry(sink, ZONES_COLLECTION, docs, retries, backoff_s)
+                checkpoint.mark(batch=index)
+            except BaseException as exc:  # pylint: disable=broad-except
+                failures.append(exc)
+            finally:
+                slots.release()
+
+        pending.append(pool.submit(run))
+
+    with ThreadPoolExecutor(max_workers=max(1, in_flight)) as pool:
+        batch: List[Doc] = []
+        for pos, agg in enumerate(ordered):
+            summary.add(agg)
+            index = pos // batch_size
+            if index not in checkpoint.done:
+                doc = zone_document(agg, max_citations)
+                doc["updatedAt"] = updated_at
+                batch.append((agg.geohash, doc))
+            if batch and ((pos + 1) % batch_size == 0 or pos + 1 == len(ordered)):
+                submit(pool, index, batch)
+                batch = []
+    for future in pending:
+        future.result()
+    if failures:
+        raise failures[0]
+
+    stats = summary.document(updated_at)
+    if not checkpoint.summary_written:
+        write_with_retry(sink, STATS_COLLECTION, [(STATS_DOC, stats)], retries, backoff_s)
+        checkpoint.mark(summary=True)
+    checkpoint.clear()
+    return stats
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Load citation risk zones into a sink.")
+    parser.add_argument("--csv", type=Path, default=Path("citations_2025.csv"), help="Citation CSV")
+    parser.add_argument(
+        "--sink",
+        required=True,
+        help="file:<dir>, emulator:<host:port> or a SQLAlchemy URL (e.g. sqlite:///zones.db)",
+    )
+    parser.add_argument("--project", default=DEFAULT_PROJECT, help="Firestore project for emulator sinks")
+    parser.add_argument("--checkpoint", type=Path, default=Path(".loader_checkpoint.json"))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--in-flight", type=int, default=4, help="Batches written concurrently")
+    parser.add_argument("--retries", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if not args.csv.exists():
+        print(f"Citation CSV file not found: {args.csv}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    zones, stats = aggregate_csv(args.csv)
+    print(f"Aggregated {stats.processed} citations into {len(zones)} zones ({stats.skipped} skipped)")
+
+    csv_stat = args.csv.stat()
+    source = f"{args.sink}|{args.csv.resolve()}|{csv_stat.st_size}|{csv_stat.st_mtime_ns}"
+    sink = open_sink(args.sink, args.project)
+    try:
+        summary = load_zones(
+            zones,
+            sink,
+            checkpoint_path=args.checkpoint,
+            batch_size=args.batch_size,
+            in_flight=args.in_flight,
+            retries=args.retries,
+            source=source,
+        )
+    finally:
+        sink.close()
+
+    print(f"Loaded {summary['totalZones']} zones in {time.perf_counter() - started:.2f}s")
+    print(f"  Peak hour: {summary['peakHour']}:00, peak day: {summary['peakDay']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
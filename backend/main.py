@@ -1,9 +1,63 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from startup import DEFAULT_RADIUS_M, MAX_RADIUS_M, Readiness, start_background
+
+readiness = Readiness()
+state: Dict[str, Any] = {}
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    start_background(readiness, state)
+    yield
 
-app = FastAPI(title="CitySmart Backend", version="1.6")
+
+app = FastAPI(title="CitySmart Backend", version="1.6", lifespan=lifespan)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
+
+@app.middleware("http")
+async def track_first_byte(request: Request, call_next):
+    response = await call_next(request)
+    readiness.mark_first_byte()
+    return response
+
+
 @app.get("/health")
 def health():
     return {"ok": True, "service": "citysmart-backend", "version": "1.6"}
+
+
+@app.get("/ready")
+def ready():
+    snapshot = readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+def zone_service():
+    service = state.get("zones")
+    if service is None:
+        raise HTTPException(status_code=503, detail="Zone index is still loading")
+    return service
+
+
+@app.get("/zones/nearby")
+def zones_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(DEFAULT_RADIUS_M, gt=0, le=MAX_RADIUS_M),
+):
+    return {"zones": zone_service().nearby(lat, lng, radius_m)}
+
+
+@app.get("/zones/{geohash}")
+def zone(geohash: str):
+    doc = zone_service().zone(geohash)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Unknown zone")
+    return doc
@@ -0,0 +1,210 @@
+"""
+Background startup and readiness tracking for the backend.
+
+The zone store is built off the request path: uvicorn starts serving `/health`
+immediately while a worker thread imports the citation modules, loads (or
+builds and caches) the zone artifact and warms the grid cells around the
+busiest zones. `/ready`
+only reports ready once that has finished.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from zones import Candidate, ZoneStore
+
+BACKEND_DIR = Path(__file__).resolve().parent
+ZONES_ARTIFACT = Path(os.environ.get("CITYSMART_ZONES_PATH", BACKEND_DIR / "data" / "citation_risk_zones.json"))
+CITATIONS_CSV = Path(os.environ.get("CITYSMART_CITATIONS_CSV", BACKEND_DIR / "citations_2025.csv"))
+WARM_ZONES = int(os.environ.get("CITYSMART_WARM_ZONES", "50"))
+# Cached (grid cell, radius) candidate lists; a cell is ~1.1 km square.
+CELL_CACHE_SIZE = 4096
+DEFAULT_RADIUS_M = 800.0
+MAX_RADIUS_M = 5000.0
+
+# Process start, captured as early as main.py imports this module.
+PROCESS_START = time.monotonic()
+
+logger = logging.getLogger("citysmart.startup")
+
+
+class Readiness:
+    """Startup progress plus time-to-first-byte and time-to-ready."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.ready = False
+        self.error: Optional[str] = None
+        self.steps: Dict[str, float] = {}
+        self.first_byte_s: Optional[float] = None
+        self.ready_s: Optional[float] = None
+
+    def step(self, name: str, started: float) -> None:
+        with self._lock:
+            self.steps[name] = round(time.monotonic() - started, 4)
+
+    def mark_first_byte(self) -> None:
+        if self.first_byte_s is not None:
+            return
+        with self._lock:
+            if self.first_byte_s is None:
+                self.first_byte_s = round(time.monotonic() - PROCESS_START, 4)
+                logger.info("time to first byte: %.3fs", self.first_byte_s)
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self.ready = True
+            self.ready_s = round(time.monotonic() - PROCESS_START, 4)
+        logger.info("time to ready: %.3fs (%s)", self.ready_s, self.steps)
+
+    def mark_failed(self, error: str) -> None:
+        with self._lock:
+            self.error = error
+        logger.error("startup failed: %s", error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "error": self.error,
+                "timeToFirstByteS": self.first_byte_s,
+                "timeToReadyS": self.ready_s,
+                "steps": dict(self.steps),
+            }
+
+
+class ZoneService:
+    """Zone store plus a bounded cache of per-grid-cell radius candidates.
+
+    Candidates are shared by every point in a cell, so arbitrary GPS points hit
+    the cache; each request still applies the exact haversine filter.
+    """
+
+    def __init__(self, store: "ZoneStore") -> None:
+        from zones import within_radius
+
+        self.store = store
+        self._within_radius = within_radius
+        self._cells: "OrderedDict[Tuple[int, int, float], List[Candidate]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def zone(self, geohash: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(geohash)
+
+    def candidates(self, cell: Tuple[int, int], radius_m: float) -> List["Candidate"]:
+        key = (cell[0], cell[1], radius_m)
+        with self._lock:
+            hit = self._cells.get(key)
+            if hit is not None:
+                self._cells.move_to_end(key)
+                return hit
+        result = self.store.candidates(cell, radius_m)
+        with self._lock:
+            self._cells[key] = result
+            if len(self._cells) > CELL_CACHE_SIZE:
+                self._cells.popitem(last=False)
+        return result
+
+    def nearby(self, lat: float, lng: float, radius_m: float) -> List[Dict[str, Any]]:
+        candidates = self.candidates(self.store.cell_of(lat, lng), radius_m)
+        return self._within_radius(candidates, lat, lng, radius_m)
+
+    def warm(self, count: int) -> int:
+        """Fill the cells around the busiest zones; returns the number of cells."""
+        cells = set()
+        for doc in self.store.busiest(count):
+            row, col = self.store.cell_of(doc["location"]["lat"], doc["location"]["lng"])
+            cells.update((row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1))
+        for cell in cells:
+            self.candidates(cell, DEFAULT_RADIUS_M)
+        return len(cells)
+
+
+def write_artifact(docs: List[Dict[str, Any]]) -> None:
+    """Atomically replace the zone artifact.
+
+    Each uvicorn worker may rebuild it at once, so every writer uses its own
+    temp file in the artifact's directory; the last `replace` wins intact.
+    """
+    ZONES_ARTIFACT.parent.mkdir(parents=True, exist_ok=True)
+    tmp: Optional[Path] = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=ZONES_ARTIFACT.parent,
+            prefix=f".{ZONES_ARTIFACT.name}.",
+            suffix=".tmp",
+            delete=False,
+        ) as fh:
+            tmp = Path(fh.name)
+            json.dump(docs, fh)
+        tmp.replace(ZONES_ARTIFACT)
+    except BaseException:
+        if tmp is not None:
+            tmp.unlink(missing_ok=True)
+        raise
+
+
+def load_zone_docs(readiness: Readiness) -> List[Dict[str, Any]]:
+    """Read the zone artifact, building it from the citation CSV when stale."""
+    started = time.monotonic()
+    csv_newer = CITATIONS_CSV.exists() and (
+        not ZONES_ARTIFACT.exists()
+        or CITATIONS_CSV.stat().st_mtime > ZONES_ARTIFACT.stat().st_mtime
+    )
+    if csv_newer:
+        from citations import aggregate_csv
+        from zones import zone_document
+
+        zones, _ = aggregate_csv(CITATIONS_CSV)
+        max_citations = max((z.total_citations for z in zones.values()), default=0)
+        docs = [zone_document(agg, max_citations) for agg in zones.values()]
+        write_artifact(docs)
+        readiness.step("build_artifact", started)
+        return docs
+    if ZONES_ARTIFACT.exists():
+        docs = json.loads(ZONES_ARTIFACT.read_bytes())
+        readiness.step("load_artifact", started)
+        return docs
+    readiness.step("no_artifact", started)
+    return []
+
+
+def warm_up(readiness: Readiness, state: Dict[str, Any]) -> None:
+    try:
+        started = time.monotonic()
+        from zones import ZoneStore
+
+        readiness.step("import", started)
+        docs = load_zone_docs(readiness)
+
+        started = time.monotonic()
+        store = ZoneStore()
+        store.load(docs)
+        service = ZoneService(store)
+        readiness.step("index", started)
+
+        started = time.monotonic()
+        service.warm(WARM_ZONES)
+        readiness.step("warm", started)
+
+        state["zones"] = service
+        readiness.mark_ready()
+    except Exception as exc:  # pylint: disable=broad-except
+        readiness.mark_failed(f"{type(exc).__name__}: {exc}")
+
+
+def start_background(readiness: Readiness, state: Dict[str, Any]) -> threading.Thread:
+    thread = threading.Thread(target=warm_up, args=(readiness, state), name="startup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,140 @@
+"""
+Resume behaviour of loader.load_zones against a FileSink.
+
+Run from backend/:
+  python -m unittest discover -s tests
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+from citations import ZoneAggregate  # noqa: E402
+from loader import STATS_COLLECTION, ZONES_COLLECTION, FileSink, load_zones  # noqa: E402
+
+BATCH_SIZE = 5
+ZONE_COUNT = 23  # five batches, the last one short
+
+
+def make_zones() -> Dict[str, ZoneAggregate]:
+    zones: Dict[str, ZoneAggregate] = {}
+    for i in range(ZONE_COUNT):
+        agg = ZoneAggregate(geohash=f"dp9k{i:02d}", lat=43.0 + i * 0.001, lng=-87.9, total_citations=i + 1)
+        agg.by_hour[i % 24] = i + 1
+        agg.by_day_of_week[i % 7] = i + 1
+        agg.by_category["meter"] = i + 1
+        zones[agg.geohash] = agg
+    return zones
+
+
+class RecordingSink(FileSink):
+    """FileSink that logs writes and raises on the `fail_on`-th write (1-based)."""
+
+    def __init__(self, root: Path, fail_on: Optional[int] = None, fail_collection: Optional[str] = None) -> None:
+        super().__init__(root)
+        self.fail_on = fail_on
+        self.fail_collection = fail_collection
+        self.attempts = 0
+        self.writes: List[Tuple[str, List[str]]] = []
+
+    def write_batch(self, collection, docs) -> None:
+        if self.fail_collection is None or collection == self.fail_collection:
+            self.attempts += 1
+            if self.attempts == self.fail_on:
+                raise RuntimeError("sink unavailable")
+        super().write_batch(collection, docs)
+        self.writes.append((collection, [doc_id for doc_id, _ in docs]))
+
+    def zone_batches(self) -> List[List[str]]:
+        return [ids for collection, ids in self.writes if collection == ZONES_COLLECTION]
+
+    def summaries(self) -> int:
+        return sum(1 for collection, _ in self.writes if collection == STATS_COLLECTION)
+
+
+class LoaderResumeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.checkpoint = self.dir / "checkpoint.json"
+        self.zones = make_zones()
+
+    def load(self, sink: RecordingSink, source: str = "file:out|citations.csv|100|1") -> Dict:
+        with contextlib.redirect_stderr(io.StringIO()):
+            return load_zones(
+                self.zones,
+                sink,
+                checkpoint_path=self.checkpoint,
+                batch_size=BATCH_SIZE,
+                in_flight=1,
+                retries=0,
+                backoff_s=0,
+                source=source,
+            )
+
+    def test_crash_leaves_checkpoint_and_rerun_writes_only_missing_batches(self) -> None:
+        with self.assertRaises(RuntimeError):
+            self.load(RecordingSink(self.dir / "out", fail_on=3))
+        saved = json.loads(self.checkpoint.read_text(encoding="utf-8"))
+        self.assertEqual(saved["done"], [0, 1])
+        self.assertFalse(saved["summary"])
+
+        sink = RecordingSink(self.dir / "out")
+        summary = self.load(sink)
+        self.assertEqual(len(sink.zone_batches()), 3)
+        self.assertEqual(sink.zone_batches()[0][0], sorted(self.zones)[2 * BATCH_SIZE])
+        self.assertEqual(sink.summaries(), 1)
+        self.assertEqual(summary["totalZones"], ZONE_COUNT)
+        self.assertEqual(len(list((self.dir / "out" / ZONES_COLLECTION).glob("*.json"))), ZONE_COUNT)
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_summary_written_once(self) -> None:
+        with self.assertRaises(RuntimeError):
+            self.load(RecordingSink(self.dir / "out", fail_on=1, fail_collection=STATS_COLLECTION))
+        self.assertEqual(json.loads(self.checkpoint.read_text(encoding="utf-8"))["done"], [0, 1, 2, 3, 4])
+
+        sink = RecordingSink(self.dir / "out")
+        self.load(sink)
+        self.assertEqual(sink.zone_batches(), [])
+        self.assertEqual(sink.summaries(), 1)
+
+    def test_checkpoint_from_other_sink_or_csv_is_ignored(self) -> None:
+        other_sources = ("file:elsewhere|citations.csv|100|1", "file:out|citations.csv|101|2")
+        for source in other_sources:
+            with self.subTest(source=source):
+                with self.assertRaises(RuntimeError):
+                    self.load(RecordingSink(self.dir / "out", fail_on=3))
+                self.assertTrue(self.checkpoint.exists())
+
+                sink = RecordingSink(self.dir / "other")
+                self.load(sink, source=source)
+                self.assertEqual(len(sink.zone_batches()), 5)
+
+    def test_finished_run_clears_checkpoint_so_next_run_loads_everything(self) -> None:
+        self.load(RecordingSink(self.dir / "out"))
+        self.assertFalse(self.checkpoint.exists())
+
+        sink = RecordingSink(self.dir / "out")
+        self.load(sink)
+        self.assertEqual(len(sink.zone_batches()), 5)
+        self.assertEqual(sink.summaries(), 1)
+
+    def test_non_object_checkpoint_is_ignored(self) -> None:
+        self.checkpoint.write_text("[1, 2, 3]", encoding="utf-8")
+        sink = RecordingSink(self.dir / "out")
+        self.load(sink)
+        self.assertEqual(len(sink.zone_batches()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
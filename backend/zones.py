@@ -0,0 +1,144 @@
+"""
+In-memory citation risk zone store with geohash lookups and radius queries.
+
+Documents mirror the `citation_risk_zones` Firestore collection written by
+process_citations.js.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from citations import (
+    ZONE_PRECISION,
+    ZoneAggregate,
+    encode_geohash,
+    peak_days,
+    peak_hours,
+    risk_level,
+    risk_score,
+    top_categories,
+)
+
+EARTH_RADIUS_M = 6_371_000.0
+
+# Degrees per grid cell used to bucket zones for radius queries (~1.1 km).
+GRID_CELL_DEG = 0.01
+
+# (lat, lng, document) of a zone that may fall inside a radius query.
+Candidate = Tuple[float, float, Dict[str, Any]]
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def zone_document(agg: ZoneAggregate, max_citations: int) -> Dict[str, Any]:
+    score = risk_score(agg, max_citations)
+    return {
+        "geohash": agg.geohash,
+        "location": {"lat": agg.lat, "lng": agg.lng},
+        "totalCitations": agg.total_citations,
+        "riskScore": score,
+        "riskLevel": risk_level(score),
+        "byHour": list(agg.by_hour),
+        "byDayOfWeek": list(agg.by_day_of_week),
+        "peakHours": peak_hours(agg),
+        "peakDays": peak_days(agg),
+        "topCategories": top_categories(agg),
+    }
+
+
+def _cell(lat: float, lng: float) -> Tuple[int, int]:
+    return math.floor(lat / GRID_CELL_DEG), math.floor(lng / GRID_CELL_DEG)
+
+
+def _spans(lat: float, radius_m: float) -> Tuple[float, float]:
+    """Degrees of latitude/longitude covering `radius_m` around latitude `lat`."""
+    lat_span = math.degrees(radius_m / EARTH_RADIUS_M)
+    lng_span = lat_span / max(0.01, math.cos(math.radians(min(89.0, abs(lat) + lat_span))))
+    return lat_span, lng_span
+
+
+def within_radius(candidates: Iterable[Candidate], lat: float, lng: float, radius_m: float) -> List[Dict[str, Any]]:
+    """Candidates within `radius_m` of the point, nearest first."""
+    hits: List[Tuple[float, Dict[str, Any]]] = []
+    for zone_lat, zone_lng, doc in candidates:
+        dist = haversine_m(lat, lng, zone_lat, zone_lng)
+        if dist <= radius_m:
+            hits.append((dist, doc))
+    hits.sort(key=lambda h: h[0])
+    return [doc for _, doc in hits]
+
+
+class ZoneStore:
+    """Risk zone documents keyed by geohash, bucketed on a lat/lng grid."""
+
+    def __init__(self, precision: int = ZONE_PRECISION) -> None:
+        self.precision = precision
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._grid: Dict[Tuple[int, int], List[str]] = {}
+
+    @classmethod
+    def from_aggregates(
+        cls, zones: Dict[str, ZoneAggregate], precision: int = ZONE_PRECISION
+    ) -> "ZoneStore":
+        store = cls(precision)
+        max_citations = max((z.total_citations for z in zones.values()), default=0)
+        store.load(zone_document(agg, max_citations) for agg in zones.values())
+        return store
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def load(self, docs: Iterable[Dict[str, Any]]) -> None:
+        for doc in docs:
+            geohash = doc["geohash"]
+            if geohash not in self._docs:
+                loc = doc["location"]
+                self._grid.setdefault(_cell(loc["lat"], loc["lng"]), []).append(geohash)
+            self._docs[geohash] = doc
+
+    def get(self, geohash: str) -> Optional[Dict[str, Any]]:
+        return self._docs.get(geohash)
+
+    def risk_at(self, lat: float, lng: float) -> Optional[Dict[str, Any]]:
+        return self._docs.get(encode_geohash(lat, lng, self.precision))
+
+    def busiest(self, count: int) -> List[Dict[str, Any]]:
+        ranked = sorted(self._docs.values(), key=lambda d: d["totalCitations"], reverse=True)
+        return ranked[:count]
+
+    def cell_of(self, lat: float, lng: float) -> Tuple[int, int]:
+        return _cell(lat, lng)
+
+    def _window(self, lo_lat: float, lo_lng: float, hi_lat: float, hi_lng: float) -> List[Candidate]:
+        lo_r, lo_c = _cell(lo_lat, lo_lng)
+        hi_r, hi_c = _cell(hi_lat, hi_lng)
+        out: List[Candidate] = []
+        for row in range(lo_r, hi_r + 1):
+            for col in range(lo_c, hi_c + 1):
+                for geohash in self._grid.get((row, col), ()):
+                    doc = self._docs[geohash]
+                    loc = doc["location"]
+                    out.append((loc["lat"], loc["lng"], doc))
+        return out
+
+    def candidates(self, cell: Tuple[int, int], radius_m: float) -> List[Candidate]:
+        """Zones that can lie within `radius_m` of any point in grid `cell`."""
+        row, col = cell
+        south, west = row * GRID_CELL_DEG, col * GRID_CELL_DEG
+        north, east = south + GRID_CELL_DEG, west + GRID_CELL_DEG
+        lat_span, lng_span = _spans(max(abs(south), abs(north)), radius_m)
+        return self._window(south - lat_span, west - lng_span, north + lat_span, east + lng_span)
+
+    def nearby(self, lat: float, lng: float, radius_m: float) -> List[Dict[str, Any]]:
+        """Zones within `radius_m` of the point, nearest first."""
+        lat_span, lng_span = _spans(lat, radius_m)
+        window = self._window(lat - lat_span, lng - lng_span, lat + lat_span, lng + lng_span)
+        return within_radius(window, lat, lng, radius_m)
@@ -9,19 +9,33 @@ Example:
     --env-file .env.firebase \
     --android-json .secrets/firebase/android/google-services.json \
     --ios-plist .secrets/firebase/ios/GoogleService-Info.plist
+
+With --sync, the current variables are fetched once over a single persistent
+connection and only variables whose content hash changed are created or
+updated (add --prune to delete ones no longer provided, --dry-run to only
+print the plan). Repeat --group to sync several groups concurrently; use
+--group NAME=VAR1,VAR2 to send only some variables to a group.
 """
 from __future__ import annotations
 
 import argparse
 import base64
+import hashlib
+import http.client
 import json
 import pathlib
+import secrets
 import sys
-from typing import Any, Dict, List
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import urllib.request
 
 API_ROOT = "https://codemagic.io/api/v3/apps"
+STATE_PATH = pathlib.Path(__file__).with_name(".codemagic_sync_state.json")
 
 
 def api_request(
@@ -29,8 +43,9 @@ def api_request(
     path: str,
     token: str,
     payload: Dict[str, Any] | None = None,
+    api_root: str = API_ROOT,
 ) -> Any:
-    url = f"{API_ROOT}{path}"
+    url = f"{api_root}{path}"
     data = None
     headers = {"x-auth-token": token}
     if payload is not None:
@@ -49,12 +64,8 @@ def api_request(
         raise RuntimeError(f"Codemagic API error {resp.status}: {body.decode()}")
 
 
-def encode_file(path: pathlib.Path) -> str:
-    return base64.b64encode(path.read_bytes()).decode("ascii")
-
-
-def list_groups(app_id: str, token: str) -> List[Dict[str, Any]]:
-    data = api_request("GET", f"/{app_id}/variable-groups", token)
+def list_groups(app_id: str, token: str, api_root: str = API_ROOT) -> List[Dict[str, Any]]:
+    data = api_request("GET", f"/{app_id}/variable-groups", token, api_root=api_root)
     if isinstance(data, dict):
         groups = (
             data.get("variableGroups")
@@ -69,8 +80,14 @@ def list_groups(app_id: str, token: str) -> List[Dict[str, Any]]:
     return []
 
 
-def ensure_group(app_id: str, token: str, name: str, description: str | None) -> str:
-    for group in list_groups(app_id, token):
+def ensure_group(
+    app_id: str,
+    token: str,
+    name: str,
+    description: str | None,
+    api_root: str = API_ROOT,
+) -> str:
+    for group in list_groups(app_id, token, api_root):
         if group.get("name") == name:
             group_id = group.get("id") or group.get("_id")
             if group_id:
@@ -78,7 +95,7 @@ def ensure_group(app_id: str, token: str, name: str, description: str | None) ->
     payload: Dict[str, Any] = {"name": name}
     if description:
         payload["description"] = description
-    created = api_request("POST", f"/{app_id}/variable-groups", token, payload)
+    created = api_request("POST", f"/{app_id}/variable-groups", token, payload, api_root)
     group_data = (
         created.get("variableGroup")
         or created.get("variable_group")
@@ -91,25 +108,343 @@ def ensure_group(app_id: str, token: str, name: str, description: str | None) ->
     return group_id
 
 
-def bulk_import(app_id: str, token: str, group_id: str, variables: List[Dict[str, Any]]) -> None:
+def bulk_import(
+    app_id: str,
+    token: str,
+    group_id: str,
+    variables: List[Dict[str, Any]],
+    api_root: str = API_ROOT,
+) -> None:
     payload = {"variables": variables}
     api_request(
         "POST",
         f"/{app_id}/variable-groups/{group_id}/variables/bulk-import",
         token,
         payload,
+        api_root,
     )
     print(f"✔ Uploaded {len(variables)} variables to group {group_id}")
 
 
+class CodemagicClient:
+    """Codemagic API client that keeps one HTTP connection open across calls."""
+
+    def __init__(self, token: str, api_root: str = API_ROOT) -> None:
+        parsed = urllib.parse.urlsplit(api_root)
+        self._token = token
+        self._scheme = parsed.scheme
+        self._netloc = parsed.netloc
+        self._prefix = parsed.path.rstrip("/")
+        self._conn: http.client.HTTPConnection | None = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            if self._scheme == "https":
+                self._conn = http.client.HTTPSConnection(self._netloc, timeout=60)
+            else:
+                self._conn = http.client.HTTPConnection(self._netloc, timeout=60)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def request(self, method: str, path: str, payload: Dict[str, Any] | None = None) -> Any:
+        body = None
+        headers = {"x-auth-token": self._token, "Connection": "keep-alive"}
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        for attempt in range(2):
+            conn = self._connect()
+            try:
+                conn.request(method, f"{self._prefix}{path}", body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed an idle keep-alive connection; reconnect once.
+                self.close()
+                if attempt:
+                    raise
+        if not 200 <= resp.status < 300:
+            raise RuntimeError(f"Codemagic API error {resp.status}: {data.decode(errors='replace')}")
+        if not data:
+            return None
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            return data.decode()
+
+
+@dataclass
+class VariableSpec:
+    """A variable to sync; `load` builds the value only when it must be uploaded."""
+
+    name: str
+    digest: str
+    load: Callable[[], str]
+    secure: bool = True
+
+
+def content_digest(data: bytes, key: str) -> str:
+    # Keyed with the state file's random salt so recorded digests can't be used
+    # to brute-force short secrets like passwords, yet survive token rotation.
+    return hashlib.blake2b(data, key=key.encode("utf-8")[:64], digest_size=32).hexdigest()
+
+
+def text_variable(name: str, value: str, key: str) -> VariableSpec:
+    digest = "text:" + content_digest(value.encode("utf-8"), key)
+    return VariableSpec(name, digest, lambda: value)
+
+
+def file_variable(name: str, path: pathlib.Path, encode: bool, key: str) -> VariableSpec:
+    data = path.read_bytes()
+    kind = "b64" if encode else "text"
+    digest = f"{kind}:" + content_digest(data, key)
+    if encode:
+        return VariableSpec(name, digest, lambda: base64.b64encode(data).decode("ascii"))
+    return VariableSpec(name, digest, lambda: data.decode("utf-8"))
+
+
+@dataclass
+class SyncPlan:
+    group: str
+    group_id: str | None
+    create: List[VariableSpec] = field(default_factory=list)
+    update: List[Tuple[str, VariableSpec]] = field(default_factory=list)
+    delete: List[Tuple[str, str]] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    def describe(self) -> List[str]:
+        lines = []
+        if self.group_id is None:
+            lines.append(f"  + create group {self.group}")
+        lines += [f"  + {spec.name}" for spec in self.create]
+        lines += [f"  ~ {spec.name}" for _, spec in self.update]
+        lines += [f"  - {name}" for _, name in self.delete]
+        lines.append(f"  = {len(self.unchanged)} unchanged")
+        return lines
+
+
+def _extract_list(data: Any, *keys: str) -> List[Dict[str, Any]]:
+    if isinstance(data, dict):
+        for key in keys:
+            value = data.get(key)
+            if isinstance(value, list):
+                return value
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def _item_id(item: Dict[str, Any]) -> str | None:
+    return item.get("id") or item.get("_id")
+
+
+def plan_group(
+    client: CodemagicClient,
+    app_id: str,
+    group: str,
+    group_id: str | None,
+    specs: List[VariableSpec],
+    recorded: Dict[str, str],
+    prune: bool,
+) -> SyncPlan:
+    plan = SyncPlan(group=group, group_id=group_id)
+    remote: Dict[str, str] = {}
+    if group_id is not None:
+        data = client.request("GET", f"/{app_id}/variable-groups/{group_id}/variables")
+        for item in _extract_list(data, "variables", "data"):
+            var_id = _item_id(item)
+            if item.get("name") and var_id:
+                remote[item["name"]] = var_id
+
+    wanted = {spec.name for spec in specs}
+    for spec in specs:
+        var_id = remote.get(spec.name)
+        if var_id is None:
+            plan.create.append(spec)
+        elif recorded.get(spec.name) != spec.digest:
+            plan.update.append((var_id, spec))
+        else:
+            plan.unchanged.append(spec.name)
+    if prune:
+        # Only delete variables this script previously uploaded.
+        for name in recorded:
+            if name not in wanted and name in remote:
+                plan.delete.append((remote[name], name))
+    return plan
+
+
+def apply_plan(
+    client: CodemagicClient,
+    app_id: str,
+    plan: SyncPlan,
+    description: str | None,
+    changes: Dict[str, str | None],
+) -> None:
+    """Execute a plan, recording name -> digest in `changes` (None = removed) as each request succeeds."""
+    group_id = plan.group_id
+    if group_id is None:
+        payload: Dict[str, Any] = {"name": plan.group}
+        if description:
+            payload["description"] = description
+        created = client.request("POST", f"/{app_id}/variable-groups", payload) or {}
+        group_data = created.get("variableGroup") or created.get("variable_group") or created
+        group_id = _item_id(group_data)
+        if not group_id:
+            raise RuntimeError("Failed to create variable group")
+    base = f"/{app_id}/variable-groups/{group_id}/variables"
+    for spec in plan.create:
+        client.request("POST", base, {"name": spec.name, "value": spec.load(), "secure": spec.secure})
+        changes[spec.name] = spec.digest
+    for var_id, spec in plan.update:
+        client.request("PATCH", f"{base}/{var_id}", {"value": spec.load(), "secure": spec.secure})
+        changes[spec.name] = spec.digest
+    for var_id, name in plan.delete:
+        client.request("DELETE", f"{base}/{var_id}")
+        changes[name] = None
+
+
+def load_state(path: pathlib.Path) -> Dict[str, Any]:
+    """State file: {"salt": <hex>, "apps": {app_id: {group: {name: digest}}}}."""
+    data: Any = {}
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            data = {}
+    if not isinstance(data, dict) or not isinstance(data.get("apps"), dict):
+        data = {"apps": {}}
+    if not data.get("salt"):
+        # A new salt invalidates nothing: there are no recorded digests yet.
+        data = {"salt": secrets.token_hex(32), "apps": {}}
+    return data
+
+
+def parse_group(value: str) -> Tuple[str, Optional[List[str]]]:
+    """`NAME` (all variables) or `NAME=VAR1,VAR2` (only those variables)."""
+    name, sep, names = value.partition("=")
+    if not sep:
+        return name.strip(), None
+    return name.strip(), [n.strip() for n in names.split(",") if n.strip()]
+
+
+def route_variables(
+    groups: List[Tuple[str, Optional[List[str]]]],
+    specs: List[VariableSpec],
+) -> Tuple[Dict[str, List[VariableSpec]], List[str]]:
+    """Assign variables to groups; returns (specs per group, errors)."""
+    by_name = {spec.name: spec for spec in specs}
+    routed: Dict[str, List[VariableSpec]] = {}
+    errors: List[str] = []
+    used: set[str] = set()
+    for group, names in groups:
+        if names is None:
+            routed[group] = list(specs)
+            used.update(by_name)
+            continue
+        unknown = [n for n in names if n not in by_name]
+        if unknown:
+            errors.append(f"Group '{group}' lists variables that were not provided: {', '.join(unknown)}")
+        routed[group] = [by_name[n] for n in names if n in by_name]
+        used.update(n for n in names if n in by_name)
+    unassigned = [name for name in by_name if name not in used]
+    if unassigned:
+        errors.append(f"Variables not assigned to any group: {', '.join(unassigned)}")
+    return routed, errors
+
+
+def sync_groups(
+    app_id: str,
+    token: str,
+    groups: List[str],
+    specs_by_group: Dict[str, List[VariableSpec]],
+    description: str | None,
+    api_root: str,
+    state: Dict[str, Any],
+    state_path: pathlib.Path,
+    prune: bool,
+    dry_run: bool,
+) -> List[str]:
+    """Plan and apply each group concurrently; returns the groups that failed."""
+    app_state = state["apps"].setdefault(app_id, {})
+    lister = CodemagicClient(token, api_root)
+    try:
+        existing = {}
+        data = lister.request("GET", f"/{app_id}/variable-groups")
+        for group in _extract_list(data, "variableGroups", "variable_groups", "data"):
+            if group.get("name") in groups and _item_id(group):
+                existing[group["name"]] = _item_id(group)
+    finally:
+        lister.close()
+
+    lock = threading.Lock()
+
+    def record(group: str, changes: Dict[str, str | None]) -> None:
+        with lock:
+            recorded = app_state.setdefault(group, {})
+            for name, digest in changes.items():
+                if digest is None:
+                    recorded.pop(name, None)
+                else:
+                    recorded[name] = digest
+
+    def run(group: str) -> None:
+        client = CodemagicClient(token, api_root)
+        changes: Dict[str, str | None] = {}
+        try:
+            plan = plan_group(
+                client,
+                app_id,
+                group,
+                existing.get(group),
+                specs_by_group[group],
+                app_state.get(group, {}),
+                prune,
+            )
+            with lock:
+                verb = "Plan" if dry_run else "Syncing"
+                print(f"{verb} for group '{group}':")
+                print("\n".join(plan.describe()))
+            if not dry_run:
+                apply_plan(client, app_id, plan, description, changes)
+        finally:
+            client.close()
+            # Keep whatever succeeded, even if a later request in this group failed.
+            record(group, changes)
+
+    failed: List[str] = []
+    try:
+        with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+            futures = {pool.submit(run, group): group for group in groups}
+            for future, group in futures.items():
+                try:
+                    future.result()
+                except Exception as exc:  # pylint: disable=broad-except
+                    print(f"Failed to sync group '{group}': {exc}", file=sys.stderr)
+                    failed.append(group)
+    finally:
+        if not dry_run:
+            state_path.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return failed
+
+
 def main(argv: list[str]) -> int:
     parser = argparse.ArgumentParser(description="Codemagic secret sync (v3)")
     parser.add_argument("--app-id", help="Codemagic app ID")
     parser.add_argument("--token", help="Codemagic API token")
     parser.add_argument(
         "--group",
+        dest="groups",
+        action="append",
         required=True,
-        help="Variable group name (e.g. firebase-secrets)",
+        help=(
+            "Variable group name (e.g. firebase-secrets), optionally NAME=VAR1,VAR2 to send only "
+            "those variables. With --sync it can be repeated."
+        ),
     )
     parser.add_argument(
         "--description",
@@ -122,6 +457,15 @@ def main(argv: list[str]) -> int:
     parser.add_argument("--distribution-p12-password", help="Password for the .p12 certificate")
     parser.add_argument("--provisioning-profile", type=pathlib.Path)
     parser.add_argument("--app-store-key", type=pathlib.Path)
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Only create/update variables whose content changed instead of bulk-importing everything",
+    )
+    parser.add_argument("--prune", action="store_true", help="With --sync, delete previously synced variables not provided now")
+    parser.add_argument("--dry-run", action="store_true", help="With --sync, print the plan without changing anything")
+    parser.add_argument("--api-root", default=API_ROOT, help="API base URL (e.g. a local fake server)")
+    parser.add_argument("--state", type=pathlib.Path, default=STATE_PATH, help="Content hash state file for --sync")
     args = parser.parse_args(argv)
 
     config = {}
@@ -178,71 +522,62 @@ def main(argv: list[str]) -> int:
             print(f"Missing {label}: {path}", file=sys.stderr)
             return 1
 
-    group_id = ensure_group(args.app_id, args.token, args.group, args.description)
-    variables = []
+    state = load_state(args.state) if args.sync else {"salt": "", "apps": {}}
+    key = state["salt"]
+    specs: List[VariableSpec] = []
     if args.env_file:
-        variables.append(
-            {
-                "name": "FIREBASE_ENV_FILE",
-                "value": args.env_file.read_text(encoding="utf-8"),
-                "secure": True,
-            }
-        )
+        specs.append(file_variable("FIREBASE_ENV_FILE", args.env_file, encode=False, key=key))
     if args.android_json:
-        variables.append(
-            {
-                "name": "ANDROID_GOOGLE_SERVICES_JSON",
-                "value": encode_file(args.android_json),
-                "secure": True,
-            }
-        )
+        specs.append(file_variable("ANDROID_GOOGLE_SERVICES_JSON", args.android_json, encode=True, key=key))
     if args.ios_plist:
-        variables.append(
-            {
-                "name": "IOS_GOOGLE_SERVICE_INFO_PLIST",
-                "value": encode_file(args.ios_plist),
-                "secure": True,
-            }
-        )
+        specs.append(file_variable("IOS_GOOGLE_SERVICE_INFO_PLIST", args.ios_plist, encode=True, key=key))
     if args.distribution_p12:
         if not args.distribution_p12_password:
             print("distribution-p12-password is required when --distribution-p12 is provided", file=sys.stderr)
             return 1
-        variables.append(
-            {
-                "name": "IOS_DISTRIBUTION_CERTIFICATE",
-                "value": encode_file(args.distribution_p12),
-                "secure": True,
-            }
-        )
-        variables.append(
-            {
-                "name": "IOS_CERTIFICATE_PASSWORD",
-                "value": args.distribution_p12_password,
-                "secure": True,
-            }
-        )
+        specs.append(file_variable("IOS_DISTRIBUTION_CERTIFICATE", args.distribution_p12, encode=True, key=key))
+        specs.append(text_variable("IOS_CERTIFICATE_PASSWORD", args.distribution_p12_password, key=key))
     if args.provisioning_profile:
-        variables.append(
-            {
-                "name": "IOS_PROVISIONING_PROFILE",
-                "value": encode_file(args.provisioning_profile),
-                "secure": True,
-            }
-        )
+        specs.append(file_variable("IOS_PROVISIONING_PROFILE", args.provisioning_profile, encode=True, key=key))
     if args.app_store_key:
-        variables.append(
-            {
-                "name": "APP_STORE_CONNECT_PRIVATE_KEY",
-                "value": args.app_store_key.read_text(encoding="utf-8"),
-                "secure": True,
-            }
-        )
-    if not variables:
+        specs.append(file_variable("APP_STORE_CONNECT_PRIVATE_KEY", args.app_store_key, encode=False, key=key))
+    if not specs:
         print("No variables to upload. Provide at least one file/secret.", file=sys.stderr)
         return 1
-    bulk_import(args.app_id, args.token, group_id, variables)
-    return 0
+
+    parsed_groups = list(dict(parse_group(g) for g in args.groups).items())
+    specs_by_group, errors = route_variables(parsed_groups, specs)
+    if errors:
+        for error in errors:
+            print(error, file=sys.stderr)
+        return 1
+    groups = [name for name, _ in parsed_groups]
+
+    if not args.sync:
+        if len(groups) > 1 or args.prune or args.dry_run:
+            print("Multiple --group, --prune and --dry-run require --sync.", file=sys.stderr)
+            return 1
+        group_id = ensure_group(args.app_id, args.token, groups[0], args.description, args.api_root)
+        variables = [
+            {"name": spec.name, "value": spec.load(), "secure": spec.secure}
+            for spec in specs_by_group[groups[0]]
+        ]
+        bulk_import(args.app_id, args.token, group_id, variables, args.api_root)
+        return 0
+
+    failed = sync_groups(
+        args.app_id,
+        args.token,
+        groups,
+        specs_by_group,
+        args.description,
+        args.api_root,
+        state,
+        args.state,
+        args.prune,
+        args.dry_run,
+    )
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
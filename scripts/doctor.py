@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
-"""Environment + secrets health check for the MKEPark Flutter project."""
+"""Environment + secrets health check for the MKEPark Flutter project.
+
+Checks are independent and run concurrently; pass --json for CI-friendly output.
+"""
 
 from __future__ import annotations
 
+import argparse
+import json
 import os
 import plistlib
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict
+from typing import Callable, Dict, List, Optional
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 ENV_FILE = ROOT_DIR / ".env.firebase"
@@ -16,6 +26,9 @@ IOS_BUNDLE_ID = "com.mkecitysmart.app"
 IOS_GOOGLE_PLIST = ROOT_DIR / "ios" / "Runner" / "GoogleService-Info.plist"
 WEB_CONFIG = ROOT_DIR / "web" / "firebase-config.json"
 WEB_CONFIG_EXAMPLE = ROOT_DIR / "web" / "firebase-config.example.json"
+CACHE_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "mkepark" / "doctor.json"
+)
 
 REQUIRED_ENV_KEYS = [
     "FIREBASE_IOS_API_KEY",
@@ -35,19 +48,86 @@ GOOGLE_CONFIG_PATHS = {
 
 PLACEHOLDER_TOKENS = ("REPLACE_ME", "MISSING_FIREBASE", "TODO")
 
-had_failure = False
 
+@dataclass
+class CheckResult:
+    name: str
+    title: str
+    messages: List[tuple[bool, str]] = field(default_factory=list)
+    duration_s: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(ok for ok, _ in self.messages)
+
+    def record(self, ok: bool, message: str) -> None:
+        self.messages.append((ok, message))
+
+
+@dataclass
+class Context:
+    env_values: Dict[str, str]
+    use_cache: bool = True
+
+
+CheckFn = Callable[[Context, CheckResult], None]
+CHECKS: List[tuple[str, str, CheckFn]] = []
+
+
+def check(name: str, title: str) -> Callable[[CheckFn], CheckFn]:
+    """Register a check; results print in registration order."""
+
+    def decorator(fn: CheckFn) -> CheckFn:
+        CHECKS.append((name, title, fn))
+        return fn
+
+    return decorator
 
-def main() -> int:
-    print("🔎  MKEPark doctor\n")
-    env_values = check_env_file()
-    check_flutter_cli()
-    if env_values:
-        check_env_keys(env_values)
-        check_secret_paths(env_values)
-    check_ios_runner_plist(env_values)
-    check_web_config()
-    print()
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="MKEPark environment doctor")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    parser.add_argument("--no-cache", action="store_true", help="Re-run slow probes like flutter --version")
+    parser.add_argument("--jobs", type=int, default=len(CHECKS), help="Checks to run at once")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    env_values = load_env(ENV_FILE) if ENV_FILE.exists() else {}
+    results = run_checks(Context(env_values, use_cache=not args.no_cache), args.jobs)
+    elapsed = time.perf_counter() - started
+    had_failure = not all(result.ok for result in results)
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "ok": not had_failure,
+                    "duration_s": round(elapsed, 3),
+                    "checks": [
+                        {
+                            "name": result.name,
+                            "title": result.title,
+                            "ok": result.ok,
+                            "duration_s": round(result.duration_s, 3),
+                            "results": [{"ok": ok, "message": msg} for ok, msg in result.messages],
+                        }
+                        for result in results
+                    ],
+                },
+                indent=2,
+            )
+        )
+        return 1 if had_failure else 0
+
+    print("🔎  MKEPark doctor")
+    for result in results:
+        if not result.messages:
+            continue
+        print(f"\n-- {result.title} ({result.duration_s:.2f}s) --")
+        for ok, message in result.messages:
+            icon = "✅" if ok else "❌"
+            print(f"{icon} {message}")
+    print(f"\nCompleted in {elapsed:.2f}s")
     if had_failure:
         print("❌  Issues found. See messages above.")
         return 1
@@ -55,78 +135,107 @@ def main() -> int:
     return 0
 
 
-def check_flutter_cli() -> None:
-    record_header("Checking Flutter installation")
+def run_checks(ctx: Context, jobs: int) -> List[CheckResult]:
+    def run(entry: tuple[str, str, CheckFn]) -> CheckResult:
+        name, title, fn = entry
+        result = CheckResult(name, title)
+        started = time.perf_counter()
+        try:
+            fn(ctx, result)
+        except Exception as exc:  # pylint: disable=broad-except
+            result.record(False, f"{name} check crashed: {exc}")
+        result.duration_s = time.perf_counter() - started
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return list(pool.map(run, CHECKS))
+
+
+@check("env_file", "Checking .env.firebase")
+def check_env_file(ctx: Context, result: CheckResult) -> None:
+    if not ENV_FILE.exists():
+        result.record(False, f"{ENV_FILE} missing. Copy .env.firebase.example and fill it in.")
+        return
+    result.record(True, f"Found {ENV_FILE}")
+
+
+@check("flutter", "Checking Flutter installation")
+def check_flutter_cli(ctx: Context, result: CheckResult) -> None:
+    flutter = shutil.which("flutter")
+    if flutter is None:
+        result.record(False, "Flutter CLI not found on PATH.")
+        return
+    cache_key = flutter_cache_key(flutter)
+    version_line = read_cache(cache_key) if ctx.use_cache else None
+    if version_line is not None:
+        result.record(True, f"Flutter available ({version_line}, cached)")
+        return
     try:
-        result = subprocess.run(
-            ["flutter", "--version"],
+        completed = subprocess.run(
+            [flutter, "--version"],
             capture_output=True,
             text=True,
             check=True,
         )
-        version_line = result.stdout.strip().splitlines()[0]
-        record(True, f"Flutter available ({version_line})")
+        version_line = completed.stdout.strip().splitlines()[0]
+        write_cache(cache_key, version_line)
+        result.record(True, f"Flutter available ({version_line})")
     except FileNotFoundError:
-        record(False, "Flutter CLI not found on PATH.")
+        result.record(False, "Flutter CLI not found on PATH.")
     except subprocess.CalledProcessError as err:
         stderr = (err.stderr or "").strip()
         if "Operation not permitted" in stderr or "Permission denied" in stderr:
-            record(
+            result.record(
                 True,
                 "Flutter CLI detected but cannot update cache (sandboxed). "
                 "Run commands with ./scripts/flutter_with_secrets.sh when needed.",
             )
         else:
-            record(False, f"flutter --version failed: {stderr}")
+            result.record(False, f"flutter --version failed: {stderr}")
 
 
-def check_env_file() -> Dict[str, str]:
-    record_header("Checking .env.firebase")
-    if not ENV_FILE.exists():
-        record(False, f"{ENV_FILE} missing. Copy .env.firebase.example and fill it in.")
-        return {}
-    record(True, f"Found {ENV_FILE}")
-    return load_env(ENV_FILE)
-
-
-def check_env_keys(env_values: Dict[str, str]) -> None:
-    record_header("Validating required env keys")
+@check("env_keys", "Validating required env keys")
+def check_env_keys(ctx: Context, result: CheckResult) -> None:
+    if not ctx.env_values:
+        return
     for key in REQUIRED_ENV_KEYS:
-        value = env_values.get(key, "").strip()
+        value = ctx.env_values.get(key, "").strip()
         if not value:
-            record(False, f"{key} is not set.")
+            result.record(False, f"{key} is not set.")
             continue
         if any(token in value for token in PLACEHOLDER_TOKENS):
-            record(False, f"{key} still uses a placeholder value ({value}).")
+            result.record(False, f"{key} still uses a placeholder value ({value}).")
         else:
-            record(True, f"{key} set.")
+            result.record(True, f"{key} set.")
 
 
-def check_secret_paths(env_values: Dict[str, str]) -> None:
-    record_header("Ensuring secret files exist")
+@check("secret_paths", "Ensuring secret files exist")
+def check_secret_paths(ctx: Context, result: CheckResult) -> None:
+    if not ctx.env_values:
+        return
     for key, (label, required) in GOOGLE_CONFIG_PATHS.items():
-        raw_path = env_values.get(key, "").strip()
+        raw_path = ctx.env_values.get(key, "").strip()
         if not raw_path:
             if required:
-                record(False, f"{label}: no path configured in {key}.")
+                result.record(False, f"{label}: no path configured in {key}.")
             else:
-                record(True, f"{label}: optional, no path configured.")
+                result.record(True, f"{label}: optional, no path configured.")
             continue
         path = Path(os.path.expanduser(raw_path))
         if path.exists():
-            record(True, f"{label}: found at {path}")
+            result.record(True, f"{label}: found at {path}")
         else:
             msg = f"{label}: file not found at {path}"
             if required:
-                record(False, msg)
+                result.record(False, msg)
             else:
-                record(True, f"{msg} (optional)")
+                result.record(True, f"{msg} (optional)")
 
 
-def check_ios_runner_plist(env_values: Dict[str, str]) -> None:
-    record_header("Checking ios/Runner/GoogleService-Info.plist")
+@check("ios_plist", "Checking ios/Runner/GoogleService-Info.plist")
+def check_ios_runner_plist(ctx: Context, result: CheckResult) -> None:
     if not IOS_GOOGLE_PLIST.exists():
-        record(
+        result.record(
             False,
             f"{IOS_GOOGLE_PLIST} missing. Copy the real plist into the Runner target.",
         )
@@ -135,46 +244,86 @@ def check_ios_runner_plist(env_values: Dict[str, str]) -> None:
         with IOS_GOOGLE_PLIST.open("rb") as fh:
             plist = plistlib.load(fh)
     except Exception as exc:  # pylint: disable=broad-except
-        record(False, f"Failed to parse GoogleService-Info.plist: {exc}")
+        result.record(False, f"Failed to parse GoogleService-Info.plist: {exc}")
         return
 
-    expected_bundle = env_values.get("FIREBASE_IOS_BUNDLE_ID", IOS_BUNDLE_ID)
+    expected_bundle = ctx.env_values.get("FIREBASE_IOS_BUNDLE_ID", IOS_BUNDLE_ID)
     actual_bundle = plist.get("BUNDLE_ID")
     if not actual_bundle:
-        record(False, "GoogleService-Info.plist missing BUNDLE_ID key.")
+        result.record(False, "GoogleService-Info.plist missing BUNDLE_ID key.")
     elif actual_bundle != expected_bundle:
-        record(
+        result.record(
             False,
             f"Plist bundle ID '{actual_bundle}' does not match expected '{expected_bundle}'.",
         )
     else:
-        record(True, f"Plist bundle ID matches ({actual_bundle}).")
+        result.record(True, f"Plist bundle ID matches ({actual_bundle}).")
 
     app_id = plist.get("GOOGLE_APP_ID")
     if not app_id:
-        record(False, "GoogleService-Info.plist missing GOOGLE_APP_ID.")
+        result.record(False, "GoogleService-Info.plist missing GOOGLE_APP_ID.")
     elif any(token in app_id for token in PLACEHOLDER_TOKENS):
-        record(False, "GoogleService-Info.plist has a placeholder GOOGLE_APP_ID.")
+        result.record(False, "GoogleService-Info.plist has a placeholder GOOGLE_APP_ID.")
     else:
-        record(True, "GoogleService-Info.plist contains a GOOGLE_APP_ID.")
+        result.record(True, "GoogleService-Info.plist contains a GOOGLE_APP_ID.")
 
 
-def check_web_config() -> None:
-    record_header("Checking web/firebase-config.json")
+@check("web_config", "Checking web/firebase-config.json")
+def check_web_config(ctx: Context, result: CheckResult) -> None:
     if WEB_CONFIG.exists():
-        record(True, f"Found {WEB_CONFIG}")
+        result.record(True, f"Found {WEB_CONFIG}")
     elif WEB_CONFIG_EXAMPLE.exists():
-        record(
+        result.record(
             True,
             "web/firebase-config.json missing (copy firebase-config.example.json and fill it in to enable Firebase on web).",
         )
     else:
-        record(
+        result.record(
             True,
             "web/firebase-config.json missing (no example file found). Web builds will need manual dart-defines.",
         )
 
 
+_cache_lock = threading.Lock()
+
+
+def flutter_cache_key(flutter: str) -> str:
+    # Upgrades rewrite the SDK version file even when bin/flutter is untouched.
+    binary = Path(flutter).resolve()
+    parts = [str(binary), str(binary.stat().st_mtime_ns)]
+    version_file = binary.parent.parent / "version"
+    if version_file.exists():
+        parts.append(str(version_file.stat().st_mtime_ns))
+    return "flutter:" + ":".join(parts)
+
+
+def read_cache(key: str) -> Optional[str]:
+    with _cache_lock:
+        try:
+            return json.loads(CACHE_FILE.read_text(encoding="utf-8")).get(key)
+        except (OSError, ValueError, AttributeError):
+            return None
+
+
+def write_cache(key: str, value: str) -> None:
+    with _cache_lock:
+        try:
+            data = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+            if not isinstance(data, dict):
+                data = {}
+        except (OSError, ValueError):
+            data = {}
+        # Drop stale entries for the same probe (old paths/mtimes).
+        prefix = key.split(":", 1)[0] + ":"
+        data = {k: v for k, v in data.items() if not k.startswith(prefix)}
+        data[key] = value
+        try:
+            CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            CACHE_FILE.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        except OSError:
+            pass
+
+
 def load_env(path: Path) -> Dict[str, str]:
     values: Dict[str, str] = {}
     for line in path.read_text().splitlines():
@@ -186,17 +335,5 @@ def load_env(path: Path) -> Dict[str, str]:
     return values
 
 
-def record_header(message: str) -> None:
-    print(f"\n-- {message} --")
-
-
-def record(ok: bool, message: str) -> None:
-    global had_failure
-    icon = "✅" if ok else "❌"
-    print(f"{icon} {message}")
-    if not ok:
-        had_failure = True
-
-
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(main(sys.argv[1:]))
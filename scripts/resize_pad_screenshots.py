@@ -3,10 +3,16 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 from PIL import Image, ImageColor, ImageOps
 
+MANIFEST_NAME = ".resize_manifest.json"
+
 
 def iter_inputs(input_dir: Path) -> list[Path]:
     patterns = ("*.png", "*.PNG", "*.jpg", "*.JPG", "*.jpeg", "*.JPEG")
@@ -16,19 +22,36 @@ def iter_inputs(input_dir: Path) -> list[Path]:
     return sorted(files)
 
 
-def resize_pad_image(
-    input_path: Path,
-    output_path: Path,
-    target_w: int,
-    target_h: int,
-    bg_rgb: tuple[int, int, int],
-) -> tuple[tuple[int, int], tuple[int, int]]:
+def parse_size(value: str) -> tuple[int, int]:
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected WIDTHxHEIGHT, got '{value}'") from None
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"Size must be positive, got '{value}'")
+    return width, height
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def load_source(input_path: Path) -> Image.Image:
     image = Image.open(input_path)
     image = ImageOps.exif_transpose(image)
 
     if image.mode not in ("RGB", "RGBA"):
         image = image.convert("RGB")
+    return image
 
+
+def pad_to(
+    image: Image.Image,
+    output_path: Path,
+    target_w: int,
+    target_h: int,
+    bg_rgb: tuple[int, int, int],
+) -> tuple[int, int]:
     src_w, src_h = image.size
     scale = min(target_w / src_w, target_h / src_h)
 
@@ -49,16 +72,61 @@ def resize_pad_image(
     output_path.parent.mkdir(parents=True, exist_ok=True)
     canvas.save(output_path, format="PNG", optimize=True)
 
-    return (src_w, src_h), (new_w, new_h)
+    return new_w, new_h
+
+
+def resize_pad_image(
+    input_path: Path,
+    output_path: Path,
+    target_w: int,
+    target_h: int,
+    bg_rgb: tuple[int, int, int],
+) -> tuple[tuple[int, int], tuple[int, int]]:
+    image = load_source(input_path)
+    return image.size, pad_to(image, output_path, target_w, target_h, bg_rgb)
+
+
+def render_targets(
+    input_path: Path,
+    targets: list[tuple[Path, int, int]],
+    bg_rgb: tuple[int, int, int],
+) -> tuple[tuple[int, int], list[tuple[Path, int, int, tuple[int, int]]]]:
+    """Decode `input_path` once and write every (output, width, height) target."""
+    image = load_source(input_path)
+    written = []
+    for output_path, target_w, target_h in targets:
+        content = pad_to(image, output_path, target_w, target_h, bg_rgb)
+        written.append((output_path, target_w, target_h, content))
+    return image.size, written
+
+
+def load_manifest(path: Path) -> dict[str, dict[str, object]]:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Resize screenshots with padding (no crop).")
     parser.add_argument("--in", dest="input_dir", required=True, help="Input directory")
     parser.add_argument("--out", dest="output_dir", required=True, help="Output directory")
-    parser.add_argument("--width", type=int, required=True, help="Target width")
-    parser.add_argument("--height", type=int, required=True, help="Target height")
+    parser.add_argument("--width", type=int, help="Target width")
+    parser.add_argument("--height", type=int, help="Target height")
+    parser.add_argument(
+        "--size",
+        dest="sizes",
+        action="append",
+        type=parse_size,
+        default=[],
+        help="Target size as WIDTHxHEIGHT. Repeat for several sizes; with more than one, each is written to OUT/WIDTHxHEIGHT/.",
+    )
     parser.add_argument("--bg", default="#081D19", help="Background color (hex), default #081D19")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Regenerate every output even if the manifest says it is current")
 
     args = parser.parse_args()
 
@@ -68,25 +136,77 @@ def main() -> int:
     if not input_dir.exists() or not input_dir.is_dir():
         raise SystemExit(f"Input dir not found: {input_dir}")
 
+    if (args.width is None) != (args.height is None):
+        raise SystemExit("--width and --height must be given together")
+    sizes = list(args.sizes)
+    if args.width is not None:
+        sizes.insert(0, (args.width, args.height))
+    if not sizes:
+        raise SystemExit("Provide --width/--height or at least one --size")
+    sizes = list(dict.fromkeys(sizes))
+    # A single target keeps the original flat OUT/<name> layout.
+    nested = len(sizes) > 1
+
     bg_rgb = ImageColor.getrgb(args.bg)
 
     inputs = iter_inputs(input_dir)
     if not inputs:
         raise SystemExit(f"No images found in: {input_dir}")
 
+    manifest_path = output_dir / MANIFEST_NAME
+    # Loaded even with --force so entries for other sizes and outputs survive.
+    manifest = load_manifest(manifest_path)
+    # Normalised so "#081d19", "#081D19" and equivalent names share entries.
+    bg_key = list(bg_rgb)
+    jobs: list[tuple[Path, list[tuple[Path, int, int]], dict[str, dict[str, object]]]] = []
+    skipped = 0
+
     for input_path in inputs:
-        output_path = output_dir / input_path.name
-        (src_w, src_h), (content_w, content_h) = resize_pad_image(
-            input_path=input_path,
-            output_path=output_path,
-            target_w=args.width,
-            target_h=args.height,
-            bg_rgb=bg_rgb,
-        )
-        print(
-            f"{input_path.name}: {src_w}x{src_h} -> {args.width}x{args.height} "
-            f"(content {content_w}x{content_h})"
-        )
+        digest = file_sha256(input_path)
+        pending = []
+        entries: dict[str, dict[str, object]] = {}
+        for target_w, target_h in sizes:
+            rel = f"{target_w}x{target_h}/{input_path.name}" if nested else input_path.name
+            output_path = output_dir / rel
+            entry = {"source": digest, "width": target_w, "height": target_h, "bg": bg_key}
+            if not args.force and manifest.get(rel) == entry and output_path.exists():
+                skipped += 1
+                continue
+            entries[rel] = entry
+            pending.append((output_path, target_w, target_h))
+        if pending:
+            jobs.append((input_path, pending, entries))
+
+    failures: list[str] = []
+    try:
+        if jobs:
+            with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(jobs)))) as pool:
+                futures = {
+                    pool.submit(render_targets, input_path, targets, bg_rgb): (input_path, entries)
+                    for input_path, targets, entries in jobs
+                }
+                for future in as_completed(futures):
+                    input_path, entries = futures[future]
+                    try:
+                        (src_w, src_h), written = future.result()
+                    except Exception as exc:  # pylint: disable=broad-except
+                        failures.append(f"{input_path.name}: {exc}")
+                        continue
+                    # Record as each source finishes so a later failure doesn't lose it.
+                    manifest.update(entries)
+                    for output_path, target_w, target_h, (content_w, content_h) in written:
+                        print(
+                            f"{input_path.name}: {src_w}x{src_h} -> {target_w}x{target_h} "
+                            f"(content {content_w}x{content_h})"
+                        )
+    finally:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    if skipped:
+        print(f"Skipped {skipped} unchanged output(s).")
+    if failures:
+        raise SystemExit("Failed to render:\n" + "\n".join(failures))
 
     return 0
 
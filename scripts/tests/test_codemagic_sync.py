@@ -0,0 +1,226 @@
+"""
+Exercises `codemagic_sync.py --sync` against an in-process fake Codemagic API.
+
+Run from the repo root:
+  python -m unittest discover -s scripts/tests
+"""
+from __future__ import annotations
+
+import contextlib
+import importlib.util
+import io
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+SCRIPT = Path(__file__).resolve().parents[1] / "codemagic_sync.py"
+_spec = importlib.util.spec_from_file_location("codemagic_sync", SCRIPT)
+codemagic_sync = importlib.util.module_from_spec(_spec)
+sys.modules["codemagic_sync"] = codemagic_sync
+_spec.loader.exec_module(codemagic_sync)
+
+
+class FakeCodemagic:
+    """Variable groups held in memory, served under /api/v3/apps/<app>/..."""
+
+    def __init__(self) -> None:
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        self.calls: List[Tuple[str, str]] = []
+        # Variable writes (POST/PATCH) left before the fake starts answering 500.
+        self.writes_left: int | None = None
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send(self, status: int, payload: Any = None) -> None:
+                body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length)) if length else {}
+
+            def _parts(self) -> List[str]:
+                # /api/v3/apps/<app>/variable-groups[/<gid>/variables[/<vid>]]
+                return self.path.split("/")[5:]
+
+            def do_GET(self) -> None:
+                fake.calls.append(("GET", self.path))
+                parts = self._parts()
+                if len(parts) == 1:
+                    groups = [{"id": gid, "name": g["name"]} for gid, g in fake.groups.items()]
+                    return self._send(200, {"data": groups})
+                variables = fake.groups[parts[1]]["variables"]
+                return self._send(200, {"data": [{"id": name, "name": name} for name in variables]})
+
+            def _refuse_write(self) -> bool:
+                if fake.writes_left is None:
+                    return False
+                if fake.writes_left == 0:
+                    self._send(500, {"error": "unavailable"})
+                    return True
+                fake.writes_left -= 1
+                return False
+
+            def do_POST(self) -> None:
+                fake.calls.append(("POST", self.path))
+                parts, body = self._parts(), self._body()
+                if len(parts) == 1:
+                    gid = f"g{len(fake.groups)}"
+                    fake.groups[gid] = {"name": body["name"], "variables": {}}
+                    return self._send(201, {"id": gid})
+                if self._refuse_write():
+                    return None
+                fake.groups[parts[1]]["variables"][body["name"]] = body["value"]
+                return self._send(201, {"id": body["name"]})
+
+            def do_PATCH(self) -> None:
+                fake.calls.append(("PATCH", self.path))
+                parts = self._parts()
+                if self._refuse_write():
+                    return None
+                fake.groups[parts[1]]["variables"][parts[3]] = self._body()["value"]
+                return self._send(200, {})
+
+            def do_DELETE(self) -> None:
+                fake.calls.append(("DELETE", self.path))
+                parts = self._parts()
+                del fake.groups[parts[1]]["variables"][parts[3]]
+                return self._send(204)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.api_root = f"http://127.0.0.1:{self.server.server_port}/api/v3/apps"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def variables(self, group: str) -> Dict[str, str]:
+        for g in self.groups.values():
+            if g["name"] == group:
+                return dict(g["variables"])
+        return {}
+
+    def writes(self) -> List[str]:
+        methods = [method for method, _ in self.calls if method != "GET"]
+        self.calls.clear()
+        return methods
+
+
+class SyncTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fake = FakeCodemagic()
+        self.addCleanup(self.fake.close)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.state = self.dir / "state.json"
+        (self.dir / "firebase.env").write_text("API_KEY=1\n", encoding="utf-8")
+        (self.dir / "dist.p12").write_bytes(b"\x00\x01")
+        (self.dir / "profile.mobileprovision").write_bytes(b"profile-v1")
+
+    def sync(self, *extra: str, token: str = "token-a", signing: bool = True) -> int:
+        argv = [
+            "--app-id", "app",
+            "--token", token,
+            "--api-root", self.fake.api_root,
+            "--state", str(self.state),
+            "--sync",
+            "--env-file", str(self.dir / "firebase.env"),
+        ]
+        if signing:
+            argv += [
+                "--distribution-p12", str(self.dir / "dist.p12"),
+                "--distribution-p12-password", "pw",
+                "--provisioning-profile", str(self.dir / "profile.mobileprovision"),
+            ]
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            return codemagic_sync.main(argv + list(extra))
+
+    def test_create_then_unchanged(self) -> None:
+        self.assertEqual(self.sync("--group", "secrets"), 0)
+        self.assertEqual(self.fake.writes(), ["POST"] * 5)
+        self.assertEqual(
+            sorted(self.fake.variables("secrets")),
+            [
+                "FIREBASE_ENV_FILE",
+                "IOS_CERTIFICATE_PASSWORD",
+                "IOS_DISTRIBUTION_CERTIFICATE",
+                "IOS_PROVISIONING_PROFILE",
+            ],
+        )
+
+        # A rotated token must not invalidate the recorded digests.
+        self.assertEqual(self.sync("--group", "secrets", token="token-b"), 0)
+        self.assertEqual(self.fake.writes(), [])
+
+    def test_update_only_changed_variable(self) -> None:
+        self.sync("--group", "secrets")
+        self.fake.writes()
+        (self.dir / "profile.mobileprovision").write_bytes(b"profile-v2")
+
+        self.assertEqual(self.sync("--group", "secrets"), 0)
+        self.assertEqual(self.fake.writes(), ["PATCH"])
+        self.assertEqual(self.fake.variables("secrets")["IOS_PROVISIONING_PROFILE"], "cHJvZmlsZS12Mg==")
+
+    def test_dry_run_writes_nothing(self) -> None:
+        self.sync("--group", "secrets")
+        self.fake.writes()
+        state_before = self.state.read_text(encoding="utf-8")
+        (self.dir / "firebase.env").write_text("API_KEY=2\n", encoding="utf-8")
+
+        self.assertEqual(self.sync("--group", "secrets", "--dry-run"), 0)
+        self.assertEqual(self.fake.writes(), [])
+        self.assertEqual(self.fake.variables("secrets")["FIREBASE_ENV_FILE"], "API_KEY=1\n")
+        self.assertEqual(self.state.read_text(encoding="utf-8"), state_before)
+
+    def test_prune_removes_dropped_variables(self) -> None:
+        self.sync("--group", "secrets")
+        self.fake.writes()
+
+        self.assertEqual(self.sync("--group", "secrets", "--prune", signing=False), 0)
+        self.assertEqual(self.fake.writes(), ["DELETE"] * 3)
+        self.assertEqual(list(self.fake.variables("secrets")), ["FIREBASE_ENV_FILE"])
+
+    def test_partial_failure_keeps_successful_digests(self) -> None:
+        self.fake.writes_left = 2
+        self.assertEqual(self.sync("--group", "secrets"), 1)
+        self.assertEqual(len(self.fake.variables("secrets")), 2)
+        self.fake.writes()
+
+        self.fake.writes_left = None
+        self.assertEqual(self.sync("--group", "secrets"), 0)
+        # Only the two variables that never made it are uploaded.
+        self.assertEqual(self.fake.writes(), ["POST", "POST"])
+
+    def test_explicit_group_mapping(self) -> None:
+        code = self.sync(
+            "--group", "firebase=FIREBASE_ENV_FILE",
+            "--group", "signing=IOS_DISTRIBUTION_CERTIFICATE,IOS_CERTIFICATE_PASSWORD,IOS_PROVISIONING_PROFILE",
+        )
+        self.assertEqual(code, 0)
+        self.assertEqual(list(self.fake.variables("firebase")), ["FIREBASE_ENV_FILE"])
+        self.assertEqual(len(self.fake.variables("signing")), 3)
+
+    def test_unassigned_variables_fail(self) -> None:
+        code = self.sync("--group", "firebase=FIREBASE_ENV_FILE", "--group", "signing=IOS_PROVISIONING_PROFILE")
+        self.assertEqual(code, 1)
+        self.assertEqual(self.fake.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,28 @@
 #!/usr/bin/env python3
-"""Simple LCOV coverage gate."""
+"""Simple LCOV coverage gate.
+
+Merges one or more LCOV files (e.g. shards from parallel test runs), reports
+coverage overall and per --include prefix, and optionally gates diff coverage
+for a list of changed line ranges.
+"""
 
 import argparse
-import re
+import hashlib
+import json
 from pathlib import Path
 
+# file -> {line number -> hit count}
+LineHits = dict[str, dict[int, int]]
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Verify LCOV coverage threshold.")
-    parser.add_argument("--lcov", default="coverage/lcov.info", help="Path to lcov.info")
+    parser.add_argument(
+        "--lcov",
+        action="append",
+        default=[],
+        help="Path to lcov.info. Repeat to merge shards (default coverage/lcov.info).",
+    )
     parser.add_argument(
         "--threshold",
         type=float,
@@ -21,54 +35,252 @@ def parse_args() -> argparse.Namespace:
         default=[],
         help="Path prefix to include (e.g., lib/services). When omitted, all files are considered.",
     )
+    parser.add_argument(
+        "--per-file",
+        action="store_true",
+        help="Also print coverage for every included file.",
+    )
+    parser.add_argument(
+        "--diff-ranges",
+        help=(
+            "File listing changed lines, one 'path:START-END[,START-END...]' entry per line. "
+            "Enables the diff coverage gate."
+        ),
+    )
+    parser.add_argument(
+        "--diff-threshold",
+        type=float,
+        default=None,
+        help="Minimum diff coverage percent required (defaults to --threshold).",
+    )
+    parser.add_argument(
+        "--cache",
+        help="Cache of parsed LCOV inputs (checked by size+mtime, then content hash); unchanged inputs are not re-parsed.",
+    )
     return parser.parse_args()
 
 
-def compute_coverage(lcov_path: Path, includes: list[str]) -> float:
-    if not lcov_path.exists():
-        raise SystemExit(f"Coverage file not found: {lcov_path}")
+def parse_lcov(lcov_path: Path) -> LineHits:
+    """Stream an LCOV file into per-file line hits, dispatching on record prefix."""
+    files: LineHits = {}
+    current: dict[int, int] | None = None
+    with lcov_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("DA:"):
+                if current is None:
+                    continue
+                fields = line[3:].split(",", 2)
+                try:
+                    number = int(fields[0])
+                    hits = int(fields[1])
+                except (IndexError, ValueError):
+                    continue
+                current[number] = current.get(number, 0) + hits
+            elif line.startswith("SF:"):
+                current = files.setdefault(line[3:].strip(), {})
+            elif line.startswith("end_of_record"):
+                current = None
+    return files
 
-    total_lines = 0
+
+def merge_hits(into: LineHits, other: LineHits) -> None:
+    for path, lines in other.items():
+        target = into.setdefault(path, {})
+        for number, hits in lines.items():
+            target[number] = target.get(number, 0) + hits
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_cache(cache_path: Path) -> dict[str, dict]:
+    """Cache entries: input path -> {size, mtime_ns, digest, files}.
+
+    JSON rather than pickle: CI caches can be restored from shared storage, and
+    loading one must never execute code. Malformed entries are dropped.
+    """
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    cache: dict[str, dict] = {}
+    for key, entry in data.items():
+        try:
+            files = {
+                str(path): {int(number): int(hits) for number, hits in lines.items()}
+                for path, lines in entry["files"].items()
+            }
+            cache[key] = {
+                "size": int(entry["size"]),
+                "mtime_ns": int(entry["mtime_ns"]),
+                "digest": str(entry["digest"]),
+                "files": files,
+            }
+        except (AttributeError, KeyError, TypeError, ValueError):
+            continue
+    return cache
+
+
+def load_lcov_files(lcov_paths: list[Path], cache_path: Path | None) -> LineHits:
+    cache = load_cache(cache_path) if cache_path else {}
+    by_digest = {entry.get("digest"): entry for entry in cache.values()}
+    fresh: dict[str, dict] = {}
+    changed = False
+
+    parsed_inputs: list[LineHits] = []
+    for lcov_path in lcov_paths:
+        if not lcov_path.exists():
+            raise SystemExit(f"Coverage file not found: {lcov_path}")
+        if cache_path is None:
+            parsed_inputs.append(parse_lcov(lcov_path))
+            continue
+        key = str(lcov_path.resolve())
+        stat = lcov_path.stat()
+        entry = cache.get(key)
+        if not entry or entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+            # Stat changed: fall back to the content hash before re-parsing.
+            digest = file_digest(lcov_path)
+            entry = by_digest.get(digest)
+            files = entry["files"] if entry else parse_lcov(lcov_path)
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest, "files": files}
+            changed = True
+        fresh[key] = entry
+        parsed_inputs.append(entry["files"])
+
+    # Only keep entries for the current inputs so the cache doesn't grow unbounded.
+    if cache_path is not None and (changed or fresh.keys() != cache.keys()):
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(fresh, separators=(",", ":")), encoding="utf-8")
+
+    if len(parsed_inputs) == 1:
+        return parsed_inputs[0]
+    merged: LineHits = {}
+    for parsed in parsed_inputs:
+        merge_hits(merged, parsed)
+    return merged
+
+
+def percent(covered: int, total: int) -> float:
+    if total == 0:
+        return 0.0
+    return (covered / total) * 100.0
+
+
+def summarize(
+    files: LineHits, includes: list[str]
+) -> tuple[tuple[int, int], dict[str, list[int]], dict[str, tuple[int, int]]]:
+    """Return (covered, total) overall, per include and per included file in one pass."""
+    per_include = {inc: [0, 0] for inc in includes}
+    per_file: dict[str, tuple[int, int]] = {}
     covered_lines = 0
+    total_lines = 0
+    for path, lines in files.items():
+        matched = [inc for inc in includes if inc in path]
+        if includes and not matched:
+            continue
+        total = len(lines)
+        covered = sum(1 for hits in lines.values() if hits > 0)
+        per_file[path] = (covered, total)
+        covered_lines += covered
+        total_lines += total
+        for inc in matched:
+            per_include[inc][0] += covered
+            per_include[inc][1] += total
+    return (covered_lines, total_lines), per_include, per_file
+
+
+def compute_coverage(lcov_path: Path, includes: list[str]) -> float:
     includes = [p.strip() for p in includes if p.strip()]
-    current_file_included = False
+    (covered, total), _, _ = summarize(load_lcov_files([lcov_path], None), includes)
+    return percent(covered, total)
 
-    line_re = re.compile(r"^DA:(\d+),(\d+)")
-    sf_re = re.compile(r"^SF:(.+)")
-    with lcov_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            sf_match = sf_re.match(line.strip())
-            if sf_match:
-                path = sf_match.group(1)
-                current_file_included = not includes or any(
-                    inc in path for inc in includes
-                )
-                continue
 
-            if not current_file_included:
+def parse_ranges(ranges_path: Path) -> dict[str, set[int]]:
+    if not ranges_path.exists():
+        raise SystemExit(f"Diff ranges file not found: {ranges_path}")
+    changed: dict[str, set[int]] = {}
+    for raw in ranges_path.read_text(encoding="utf-8").splitlines():
+        raw = raw.strip()
+        if not raw or raw.startswith("#") or ":" not in raw:
+            continue
+        path, spans = raw.rsplit(":", 1)
+        lines = changed.setdefault(path.strip(), set())
+        for span in spans.split(","):
+            span = span.strip()
+            if not span:
                 continue
+            start, _, end = span.partition("-")
+            try:
+                lines.update(range(int(start), int(end or start) + 1))
+            except ValueError:
+                raise SystemExit(f"Invalid line range '{span}' in {ranges_path}") from None
+    return changed
+
 
-            match = line_re.match(line.strip())
-            if not match:
+def diff_coverage(files: LineHits, changed: dict[str, set[int]]) -> tuple[int, int]:
+    """Covered/total over changed lines that LCOV marks as executable."""
+    covered_lines = 0
+    total_lines = 0
+    for path, lines in files.items():
+        wanted: set[int] = set()
+        for changed_path, numbers in changed.items():
+            if path == changed_path or path.endswith("/" + changed_path) or changed_path.endswith("/" + path):
+                wanted |= numbers
+        for number in wanted:
+            hits = lines.get(number)
+            if hits is None:
                 continue
             total_lines += 1
-            hits = int(match.group(2))
             if hits > 0:
                 covered_lines += 1
-
-    if total_lines == 0:
-        return 0.0
-    return (covered_lines / total_lines) * 100.0
+    return covered_lines, total_lines
 
 
 def main() -> None:
     args = parse_args()
-    percent = compute_coverage(Path(args.lcov), args.include)
-    print(f"Coverage: {percent:.2f}% (threshold {args.threshold:.2f}%)")
-    if percent < args.threshold:
-        raise SystemExit(
-            f"Coverage below threshold: {percent:.2f}% < {args.threshold:.2f}%"
-        )
+    lcov_paths = [Path(p) for p in args.lcov] or [Path("coverage/lcov.info")]
+    includes = list(dict.fromkeys(p.strip() for p in args.include if p.strip()))
+    files = load_lcov_files(lcov_paths, Path(args.cache) if args.cache else None)
+
+    (covered, total), per_include, per_file = summarize(files, includes)
+    for inc, (inc_covered, inc_total) in per_include.items():
+        print(f"  {inc}: {percent(inc_covered, inc_total):.2f}% ({inc_covered}/{inc_total})")
+    if args.per_file:
+        for path in sorted(per_file):
+            file_covered, file_total = per_file[path]
+            print(f"    {path}: {percent(file_covered, file_total):.2f}% ({file_covered}/{file_total})")
+
+    failures = []
+    value = percent(covered, total)
+    print(f"Coverage: {value:.2f}% (threshold {args.threshold:.2f}%)")
+    if value < args.threshold:
+        failures.append(f"Coverage below threshold: {value:.2f}% < {args.threshold:.2f}%")
+
+    if args.diff_ranges:
+        diff_threshold = args.threshold if args.diff_threshold is None else args.diff_threshold
+        diff_covered, diff_total = diff_coverage(files, parse_ranges(Path(args.diff_ranges)))
+        if diff_total == 0:
+            print("Diff coverage: no executable changed lines")
+        else:
+            diff_value = percent(diff_covered, diff_total)
+            print(
+                f"Diff coverage: {diff_value:.2f}% ({diff_covered}/{diff_total}, "
+                f"threshold {diff_threshold:.2f}%)"
+            )
+            if diff_value < diff_threshold:
+                failures.append(
+                    f"Diff coverage below threshold: {diff_value:.2f}% < {diff_threshold:.2f}%"
+                )
+
+    if failures:
+        raise SystemExit("\n".join(failures))
 
 
 if __name__ == "__main__":